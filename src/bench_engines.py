@@ -0,0 +1,231 @@
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from build import DEFAULT_DOCUMENTS_DIR, DEFAULT_REVISIONS_CSV, scratch_root, tex_env
+from category_registry import use_registry
+from config import PACKAGES
+from engines import ENGINES, available_engines
+from generate_doc_list import load_register, load_revision_data, write_latex_list
+from report_wrapper import TEX_DIR, write_report_wrapper
+from texlog import parse_log
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_PACKAGE = "for_manufacture"
+DEFAULT_REPEAT = 3
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+class EngineResult:
+    """Timings and log figures of one engine over all repeats."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.times = []
+        self.peak_rss = 0        # kB, largest over all runs
+        self.report = None       # log report of the last run
+        self.error = None
+
+    def row(self) -> str:
+        name = f"{self.engine.name:<18}"
+        if self.error is not None:
+            return f"{name} failed: {self.error}"
+        peak = self.report.peak_memory() if self.report else None
+        pages = self.report.pages if self.report and self.report.pages is not None else "-"
+        return (
+            f"{name} {statistics.median(self.times):8.2f}s {min(self.times):8.2f}s"
+            f" {pages:>6} {f'{peak[1]:.0%}' if peak else '-':>8}"
+            f" {f'{self.peak_rss // 1024} MB' if self.peak_rss else '-':>9}"
+        )
+
+
+def run_pass(command: list, env: dict) -> tuple:
+    """Run one engine pass; (exit code, peak RSS in kB or 0)."""
+    process = subprocess.Popen(
+        command,
+        cwd=TEX_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if not hasattr(os, "wait4"):
+        return process.wait(), 0
+
+    # wait4 reports the resources of the engine and everything it ran
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, usage.ru_maxrss
+
+
+def bench_engine(engine, wrapper: Path, work_dir: Path, repeat: int) -> EngineResult:
+    """Compile `wrapper` from scratch `repeat` times with one engine."""
+    result = EngineResult(engine)
+    for attempt in range(repeat):
+        output_dir = work_dir / f"{engine.name}-{attempt}"
+        output_dir.mkdir()
+        command = engine.command(wrapper, output_dir)
+        env = tex_env(output_dir)
+
+        start = time.perf_counter()
+        for _ in range(engine.runs):
+            returncode, rss = run_pass(command, env)
+            result.peak_rss = max(result.peak_rss, rss)
+            if returncode != 0:
+                break
+        elapsed = time.perf_counter() - start
+
+        result.report = parse_log(output_dir / f"{wrapper.stem}.log")
+        if returncode != 0:
+            errors = result.report.errors if result.report else []
+            result.error = f"exit {returncode}" + (f", {errors[0][0]}" if errors else "")
+            break
+        result.times.append(elapsed)
+        print(f"  {engine.name} run {attempt + 1}/{repeat}: {elapsed:.2f}s")
+    return result
+
+
+def print_results(results: list) -> None:
+    print(f"\n{'engine':<18} {'median':>9} {'best':>9} {'pages':>6} {'TeX mem':>8} {'peak RSS':>9}")
+    for result in results:
+        print(result.row())
+
+    finished = sorted(
+        (result for result in results if result.error is None),
+        key=lambda result: statistics.median(result.times),
+    )
+    if not finished:
+        print("\nNo engine compiled the report.")
+        return
+
+    fastest = finished[0]
+    line = f"\nFastest: {fastest.engine.name}"
+    if len(finished) > 1:
+        runner_up = finished[1]
+        ratio = statistics.median(runner_up.times) / statistics.median(fastest.times)
+        line += f" ({ratio:.2f}x {runner_up.engine.name})"
+    print(line)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Time every installed TeX engine compiling one package report from "
+            "the current register."
+        )
+    )
+    parser.add_argument(
+        "--documents-dir",
+        type=Path,
+        default=DEFAULT_DOCUMENTS_DIR,
+        help="Folder containing drawing/document files.",
+    )
+    parser.add_argument(
+        "--revisions-csv",
+        type=Path,
+        help="Revisions CSV. Defaults to revisions.csv inside --documents-dir.",
+    )
+    parser.add_argument(
+        "--categories",
+        type=Path,
+        help="Optional project category registry (.json or .toml).",
+    )
+    parser.add_argument(
+        "--package",
+        choices=list(PACKAGES),
+        default=DEFAULT_PACKAGE,
+        help="Package whose report is compiled (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--engines",
+        help=(
+            "Comma-separated engines to compare. Defaults to every installed one "
+            f"of: {', '.join(ENGINES)}."
+        ),
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Cold builds per engine (default: %(default)s).",
+    )
+    return parser.parse_args(argv)
+
+
+def selected_engines(value: Optional[str]) -> list:
+    if not value:
+        return available_engines()
+
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        raise SystemExit(
+            f"Unknown engine(s): {', '.join(unknown)}. Available: {', '.join(ENGINES)}"
+        )
+    engines = []
+    for name in names:
+        if ENGINES[name].available():
+            engines.append(ENGINES[name])
+        else:
+            print(f"Skipping {name}: '{ENGINES[name].program}' is not installed")
+    return engines
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.categories is not None:
+        use_registry(args.categories.expanduser().resolve())
+    documents_dir = args.documents_dir.expanduser().resolve()
+    if args.revisions_csv is not None:
+        revisions_csv = args.revisions_csv.expanduser().resolve()
+    elif documents_dir != DEFAULT_DOCUMENTS_DIR:
+        # Same default as build.py for an external documents folder
+        revisions_csv = documents_dir / "revisions.csv"
+    else:
+        revisions_csv = DEFAULT_REVISIONS_CSV
+
+    engines = selected_engines(args.engines)
+    if not engines:
+        raise SystemExit("No TeX engine installed.")
+
+    with tempfile.TemporaryDirectory(prefix="bench-engines-", dir=scratch_root()) as scratch:
+        work_dir = Path(scratch)
+        register = load_register(documents_dir)
+        sections = register.sections(args.package)
+        document_list = work_dir / f"document_list_{args.package}.tex"
+        write_latex_list(
+            sections,
+            document_list,
+            load_revision_data(revisions_csv),
+            PACKAGES[args.package]["title"],
+        )
+        wrapper = write_report_wrapper(args.package, document_list, work_dir)
+        rows = sum(len(files) for _, files in sections)
+        print(
+            f"Benchmarking {len(engines)} engine(s) on report_{args.package} "
+            f"({rows} documents, {max(1, args.repeat)} run(s) each)"
+        )
+
+        results = []
+        for engine in engines:
+            results.append(bench_engine(engine, wrapper, work_dir, max(1, args.repeat)))
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
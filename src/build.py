@@ -1,10 +1,60 @@
 import argparse
+import asyncio
+import hashlib
+import os
 import subprocess
 import shutil
-import sys
+import tempfile
+import time
 from pathlib import Path
 from typing import Optional
 
+import generate_doc_list
+import metrics
+import report_wrapper
+from category_registry import use_registry
+from config import PACKAGES
+from engines import DEFAULT_ENGINE, ENGINES, Engine, get_engine
+from coordination import FolderLocks, build_key, completed_outputs, record_build
+from discovery import DEFAULT_PRECEDENCE, PRECEDENCE, resolve_roots
+from generate_doc_list import (
+    list_parts,
+    load_register,
+    load_revision_data,
+    parse_packages,
+    write_document_lists,
+    write_latex_rows,
+)
+from fileops import file_digest, module_digest, publish_file
+from filename_parser import get_drawing_code
+from register import routing_digest
+from snapshots import (
+    Snapshot,
+    change_counts,
+    delta_groups,
+    diff_snapshots,
+    latest_snapshot,
+    new_snapshot_path,
+    package_changes,
+    snapshot_rows,
+    write_snapshot,
+)
+from streaming import SPILL_ROWS, sorted_documents, stream_document_lists
+from transmittal import export_transmittals
+from texlog import LogReport, describe, parse_log
+from reproducible import (
+    input_manifest,
+    reproducible_env,
+    source_date_epoch,
+)
+from report_wrapper import (
+    PREAMBLE_FILE,
+    PROJECT_META_FILE,
+    TEX_DIR,
+    write_join_wrapper,
+    write_report_wrapper,
+)
+
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -12,30 +62,32 @@ from typing import Optional
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
-# Scripts and files
-DOC_LIST_SCRIPT = PROJECT_ROOT / "src" / "generate_doc_list.py"
-TEX_FILES = [
-    PROJECT_ROOT / "latex_build" / "test" / "report_for_client.tex",
-    PROJECT_ROOT / "latex_build" / "test" / "report_for_manufacture.tex",
-    PROJECT_ROOT / "latex_build" / "test" / "report_for_installation.tex",
-]
-
 # Output folders
 RESULT_DIR = PROJECT_ROOT / "latex_result"
 BUILD_DIR = PROJECT_ROOT / "latex_build"
 
-LATEX_EXTENSIONS = {
-    ".aux",
-    ".log",
-    ".out",
-    ".toc",
-    ".lof",
-    ".lot",
-    ".fls",
-    ".fdb_latexmk",
-    ".synctex.gz",
+# Default inputs of generate_doc_list.py
+DEFAULT_DOCUMENTS_DIR = PROJECT_ROOT / "data" / "documents"
+DEFAULT_REVISIONS_CSV = PROJECT_ROOT / "data" / "revisions.csv"
+
+# Reports a build publishes, possibly into a documents folder; they are
+# not part of the register and are left out of the build key
+PUBLISHED_REPORTS = {
+    name
+    for pkg in PACKAGES
+    for name in (f"report_{pkg}.pdf", f"report_{pkg}_changes.pdf")
 }
 
+# RAM-backed scratch space for TeX runs, used when present and writable
+TMPFS_DIRS = [Path("/dev/shm")]
+
+# Pipeline concurrency: TeX is CPU-bound, publishing is network-bound
+DEFAULT_JOBS = os.cpu_count() or 1
+PUBLISH_JOBS = 2
+
+# Numbered shard passes before giving up on stable page counts
+RENUMBER_PASSES = 3
+
 # ---------------------------------------------------------------------------
 # Build steps
 # ---------------------------------------------------------------------------
@@ -64,94 +116,632 @@ def ensure_writable_output_dir(path: Path, fallback: Path) -> Path:
         )
         return fallback
 
-def generate_document_list(
-    documents_dir: Optional[Path] = None,
-    revisions_csv: Optional[Path] = None,
-    output_dir: Optional[Path] = None,
-):
+def scratch_root() -> Optional[Path]:
     """
-    Generate the LaTeX document list from files in a document folder.
+    Return a tmpfs directory for build scratch space, or None to use the
+    system temp directory.
     """
-    print("Generating document list...")
-    command = [sys.executable, DOC_LIST_SCRIPT.name]
-    if documents_dir is not None:
-        command.extend(["--documents-dir", str(documents_dir)])
-    if revisions_csv is not None:
-        command.extend(["--revisions-csv", str(revisions_csv)])
-    if output_dir is not None:
-        command.extend(["--output-dir", str(output_dir)])
-    subprocess.run(
-        command,
-        cwd=DOC_LIST_SCRIPT.parent,
-        check=True,
+    for candidate in TMPFS_DIRS:
+        if candidate.is_dir() and os.access(candidate, os.W_OK):
+            return candidate
+    return None
+
+
+async def run_command(
+    command: list,
+    cwd: Path,
+    env: Optional[dict] = None,
+    check: bool = True,
+    stdout=None,
+) -> int:
+    """
+    Run a subprocess without blocking the event loop and return its exit
+    code; raise on failure when `check` is set.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *[str(part) for part in command], cwd=cwd, env=env, stdout=stdout
     )
+    try:
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        # Another package failed; do not leave TeX running behind us
+        process.kill()
+        await process.wait()
+        raise
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+    return returncode
 
 
-def run_pdflatex(tex_file: Path, runs: int = 2):
+async def gather_all(coroutines) -> list:
     """
-    Run pdflatex multiple times to resolve references if needed.
+    Await `coroutines` concurrently and return their results in order. The
+    first failure cancels the others and is raised once they have stopped.
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def report_inputs(tex_file: Path, document_list: Path) -> list:
+    """
+    Files that determine the content of a report PDF.
+    """
+    return [tex_file, PROJECT_META_FILE, PREAMBLE_FILE, document_list]
+
+
+def tex_env(output_dir: Path, env: Optional[dict] = None) -> dict:
+    env = dict(env if env is not None else os.environ)
+    env["TEXMFOUTPUT"] = str(output_dir)
+    return env
+
+
+def check_pass(
+    tex_file: Path,
+    output_dir: Path,
+    run: int,
+    runs: int,
+    elapsed: float,
+    returncode: int,
+) -> Optional[LogReport]:
     """
-    print("Running pdflatex...")
+    Summarise one TeX pass from its log: timing, pages, errors, boxes
+    and TeX memory usage. Details are printed for the last or a failed pass.
+    """
+    report = parse_log(output_dir / f"{tex_file.stem}.log")
+    label = f"{tex_file.stem} pass {run + 1}/{runs}: {elapsed:.2f}s"
+    if report is None:
+        print(f"{label}, no log written")
+        return None
+
+    print(f"{label}, {report.summary()}")
+    if run + 1 == runs or returncode != 0:
+        for line in describe(report):
+            print(f"  {line}")
+    if run + 1 == runs and report.rerun:
+        print(
+            f"Warning: {tex_file.stem} still asks for a rerun after {runs} "
+            f"passes: {report.rerun[-1]}"
+        )
+    return report
+
+
+def run_tex(
+    tex_file: Path,
+    output_dir: Path,
+    runs: Optional[int] = None,
+    env: Optional[dict] = None,
+    preamble: str = "",
+    engine: Engine = ENGINES[DEFAULT_ENGINE],
+) -> Optional[LogReport]:
+    """
+    Run the TeX engine in TEX_DIR, writing to `output_dir`, until references
+    settle (`runs` defaults to the engine's pass count). Returns the last
+    pass's log report.
+    """
+    print(f"Running {engine.name}...")
+    runs = runs or engine.runs
+    command = engine.command(tex_file, output_dir, preamble)
+    env = tex_env(output_dir, env)
+    report = None
+    for i in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            command,
+            cwd=TEX_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        metrics.count("tex_passes", engine=engine.name)
+        report = check_pass(
+            tex_file, output_dir, i, runs,
+            time.perf_counter() - start, completed.returncode,
+        )
+        if completed.returncode != 0:
+            raise subprocess.CalledProcessError(completed.returncode, command)
+    return report
+
+
+async def run_pass_async(
+    tex_file: Path,
+    output_dir: Path,
+    run: int,
+    runs: int,
+    env: Optional[dict] = None,
+    preamble: str = "",
+    engine: Engine = ENGINES[DEFAULT_ENGINE],
+) -> Optional[LogReport]:
+    """One engine pass as a coroutine; returns the report of its log."""
+    command = engine.command(tex_file, output_dir, preamble)
+    start = time.perf_counter()
+    returncode = await run_command(
+        command, cwd=TEX_DIR, env=tex_env(output_dir, env), check=False,
+        stdout=subprocess.DEVNULL,
+    )
+    metrics.count("tex_passes", engine=engine.name)
+    report = check_pass(
+        tex_file, output_dir, run, runs,
+        time.perf_counter() - start, returncode,
+    )
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+    return report
+
+
+async def run_tex_async(
+    tex_file: Path,
+    output_dir: Path,
+    runs: Optional[int] = None,
+    env: Optional[dict] = None,
+    preamble: str = "",
+    engine: Engine = ENGINES[DEFAULT_ENGINE],
+) -> Optional[LogReport]:
+    """`run_tex` as a coroutine, so other packages progress meanwhile."""
+    print(f"Running {engine.name} ({tex_file.stem})...")
+    runs = runs or engine.runs
+    report = None
     for i in range(runs):
-        subprocess.run(
-            ["pdflatex", tex_file.name],
-            cwd=tex_file.parent,
-            check=True,
+        report = await run_pass_async(
+            tex_file, output_dir, i, runs, env, preamble, engine
         )
+    return report
 
 
-def move_outputs(tex_file: Path, result_dir: Path):
+def move_outputs(tex_file: Path, output_dir: Path, result_dir: Path) -> int:
     """
-    Move the generated PDF and LaTeX build artefacts into
-    their respective folders.
+    Publish the PDF to `result_dir` and keep its log in latex_build/;
+    returns the bytes written.
     """
     result_dir.mkdir(parents=True, exist_ok=True)
     BUILD_DIR.mkdir(exist_ok=True)
 
-    base_name = tex_file.stem
-
-    for file in tex_file.parent.iterdir():
-        # Final PDF → latex_result/
-        if file.suffix == ".pdf" and file.stem == base_name:
-            destination = result_dir / file.name
-            try:
-                shutil.move(str(file), destination)
-            except PermissionError:
-                # Cross-filesystem move may internally use copy2 + copystat,
-                # which can fail on SMB/DrvFs when metadata updates are denied.
-                try:
-                    # copyfile avoids metadata operations (utime/chmod), so it
-                    # succeeds on more restrictive network shares.
-                    shutil.copyfile(file, destination)
-                    file.unlink()
-                except PermissionError:
-                    fallback_destination = RESULT_DIR / file.name
-                    RESULT_DIR.mkdir(parents=True, exist_ok=True)
-                    # Last-resort: ensure build completion by writing locally
-                    # when the share blocks overwrite/create for this file.
-                    print(
-                        f"Warning: Cannot write '{destination}'. "
-                        f"Saving PDF to '{fallback_destination}' instead."
-                    )
-                    shutil.move(str(file), fallback_destination)
-
-        # Build artefacts → latex_build/
-        elif file.suffix in LATEX_EXTENSIONS:
-            shutil.move(str(file), BUILD_DIR / file.name)
+    pdf_file = output_dir / f"{tex_file.stem}.pdf"
+    log_file = output_dir / f"{tex_file.stem}.log"
+
+    if log_file.exists():
+        shutil.copyfile(log_file, BUILD_DIR / log_file.name)
+
+    # Final PDF → latex_result/
+    destination = result_dir / pdf_file.name
+    try:
+        # Temp file + rename on the destination; skipped entirely when
+        # the share already holds identical bytes.
+        return publish_file(pdf_file, destination)
+    except PermissionError:
+        fallback_destination = RESULT_DIR / pdf_file.name
+        RESULT_DIR.mkdir(parents=True, exist_ok=True)
+        # Last-resort: ensure build completion by writing locally
+        # when the share blocks overwrite/create for this file.
+        print(
+            f"Warning: Cannot write '{destination}'. "
+            f"Saving PDF to '{fallback_destination}' instead."
+        )
+        return publish_file(pdf_file, fallback_destination)
+
+
+def reproducible_options(epoch: Optional[int], inputs: list, engine: Engine) -> tuple:
+    """(env, preamble) for the engine; pinned to `epoch` and `inputs` when set."""
+    if epoch is None:
+        return None, ""
+    # Same length as the MD5-based ID pdfTeX generates by default.
+    manifest = input_manifest(inputs)[:32]
+    return reproducible_env(epoch), engine.reproducible_preamble(manifest)
+
+
+class PipelineStages:
+    """Concurrency limits for each stage of the per-package pipeline."""
+
+    def __init__(self, jobs: int = DEFAULT_JOBS, publish_jobs: int = PUBLISH_JOBS):
+        self.compile = asyncio.Semaphore(jobs)
+        self.publish = asyncio.Semaphore(publish_jobs)
+
+
+async def compile_report(
+    pkg: str,
+    document_list: Path,
+    stages: PipelineStages,
+    result_dir: Path,
+    epoch: Optional[int] = None,
+    jobname: Optional[str] = None,
+    title: Optional[str] = None,
+    engine: Engine = ENGINES[DEFAULT_ENGINE],
+) -> int:
+    """
+    Compile one report in its own scratch folder and publish its PDF;
+    returns the bytes published.
+    """
+    with tempfile.TemporaryDirectory(
+        prefix=f"{jobname or f'report_{pkg}'}-", dir=scratch_root()
+    ) as scratch:
+        scratch_dir = Path(scratch)
+        tex_file = write_report_wrapper(
+            pkg, document_list, scratch_dir, jobname=jobname, title=title
+        )
+
+        env, preamble = reproducible_options(
+            epoch, report_inputs(tex_file, document_list), engine
+        )
+
+        async with stages.compile:
+            with metrics.timer("compile", package=pkg):
+                report = await run_tex_async(
+                    tex_file, scratch_dir, env=env, preamble=preamble, engine=engine
+                )
+        if report is not None and report.pages is not None:
+            metrics.count("pages_written", report.pages, package=pkg)
+        return await publish_report(pkg, tex_file, scratch_dir, result_dir, stages)
+
+
+async def publish_report(
+    pkg: str, tex_file: Path, scratch_dir: Path, result_dir: Path, stages: PipelineStages
+) -> int:
+    """Publish a compiled report from a worker thread; returns the bytes written."""
+    async with stages.publish:
+        with metrics.timer("publish", package=pkg):
+            transferred = await asyncio.to_thread(
+                move_outputs, tex_file, scratch_dir, result_dir
+            )
+    metrics.count("bytes_published", transferred, package=pkg)
+    return transferred
+
+
+def first_pages(page_counts: list) -> list:
+    """Page number each shard starts on, given the pages of every shard."""
+    starts = [1]
+    for pages in page_counts[:-1]:
+        starts.append(starts[-1] + pages)
+    return starts
+
+
+async def compile_sharded_report(
+    pkg: str,
+    parts: list,
+    stages: PipelineStages,
+    result_dir: Path,
+    epoch: Optional[int] = None,
+    engine: Engine = ENGINES[DEFAULT_ENGINE],
+) -> int:
+    """
+    Compile report_<pkg>.pdf as parallel shards of a split list, renumber
+    their pages and join them with pdfpages. Returns the bytes published.
+    """
+    jobname = f"report_{pkg}"
+    with tempfile.TemporaryDirectory(
+        prefix=f"{jobname}-", dir=scratch_root()
+    ) as scratch:
+        scratch_dir = Path(scratch)
+        shards = [f"{jobname}_shard{number:02d}" for number in range(1, len(parts) + 1)]
+
+        async def compile_shard(index: int, run: int, first_page: int) -> int:
+            tex_file = write_report_wrapper(
+                pkg, parts[index], scratch_dir, jobname=shards[index],
+                first_page=first_page, heading=index == 0,
+            )
+            env, preamble = reproducible_options(
+                epoch, report_inputs(tex_file, parts[index]), engine
+            )
+            async with stages.compile:
+                report = await run_pass_async(
+                    tex_file, scratch_dir, run, 2, env, preamble, engine
+                )
+            if report is None or report.pages is None:
+                raise RuntimeError(f"{shards[index]} produced no pages")
+            return report.pages
+
+        async def compile_shards(run: int, starts: list) -> list:
+            return await gather_all(
+                compile_shard(index, run, start) for index, start in enumerate(starts)
+            )
+
+        print(f"Running {engine.name} ({jobname}, {len(shards)} shards)...")
+        with metrics.timer("compile", package=pkg):
+            page_counts = await compile_shards(0, [1] * len(shards))
+            for _ in range(RENUMBER_PASSES):
+                numbered = await compile_shards(1, first_pages(page_counts))
+                if numbered == page_counts:
+                    break
+                print(f"Shard page counts of {jobname} changed; renumbering...")
+                page_counts = numbered
+            else:
+                print(
+                    f"Warning: Shard page counts of {jobname} still changed after "
+                    f"{RENUMBER_PASSES} numbered passes; page numbers may be off."
+                )
+
+        tex_file = write_join_wrapper(
+            [scratch_dir / f"{shard}.pdf" for shard in shards], scratch_dir, jobname
+        )
+        # The join wrapper names the scratch folder; key the ID on the shards.
+        env, preamble = reproducible_options(
+            epoch,
+            [PROJECT_META_FILE, PREAMBLE_FILE, *parts]
+            + [scratch_dir / f"{shard}.tex" for shard in shards],
+            engine,
+        )
+        async with stages.compile:
+            with metrics.timer("join", package=pkg):
+                await run_tex_async(
+                    tex_file, scratch_dir, runs=1, env=env, preamble=preamble,
+                    engine=engine,
+                )
+        print(f"Joined {len(shards)} shards into {jobname}.pdf ({sum(page_counts)} pages)")
+        metrics.count("pages_written", sum(page_counts), package=pkg)
+
+        return await publish_report(pkg, tex_file, scratch_dir, result_dir, stages)
+
+
+async def build_package(
+    pkg: str,
+    stages: PipelineStages,
+    output_dir: Path,
+    result_dir: Path,
+    epoch: Optional[int] = None,
+    changes: Optional[dict] = None,
+    shards: int = 1,
+    engine: Engine = ENGINES[DEFAULT_ENGINE],
+) -> int:
+    """
+    Compile and publish one package's report (and its changes report, if
+    any); returns the bytes published.
+    """
+    document_list = output_dir / f"document_list_{pkg}.tex"
+
+    parts = list_parts(document_list) if shards > 1 else []
+    if len(parts) > 1:
+        reports = [compile_sharded_report(
+            pkg, parts, stages, result_dir, epoch, engine=engine
+        )]
+    else:
+        reports = [compile_report(
+            pkg, document_list, stages, result_dir, epoch, engine=engine
+        )]
+    if changes and pkg in changes:
+        changes_list, title = changes[pkg]
+        reports.append(compile_report(
+            pkg, changes_list, stages, result_dir, epoch,
+            jobname=f"report_{pkg}_changes", title=title, engine=engine,
+        ))
+    return sum(await gather_all(reports))
+
+
+async def build_packages(packages: list, jobs: int = DEFAULT_JOBS, **options) -> int:
+    """
+    Run the pipeline for every package concurrently; a failing package
+    cancels the others. Returns the total number of bytes published.
+    """
+    stages = PipelineStages(jobs)
+    return sum(await gather_all(
+        build_package(pkg, stages, **options) for pkg in packages
+    ))
+
+
+class NameDigest:
+    """
+    Digest of a set of document names that does not depend on the order
+    they are listed in, so a listing can be keyed while it streams past.
+    Published reports are left out.
+    """
+
+    def __init__(self):
+        self.total = 0
+
+    def add(self, name: str) -> None:
+        if name not in PUBLISHED_REPORTS:
+            value = int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest(), "big")
+            self.total = (self.total + value) % (1 << 256)
+
+    def hexdigest(self) -> str:
+        return f"{self.total:064x}"
+
+
+class DocumentListing:
+    """
+    The one listing of the document roots a build is keyed on and writes
+    every package's lists from, in memory or, with `streaming`, sorted on
+    disk.
+    """
+
+    def __init__(
+        self,
+        roots: list,
+        precedence: str = DEFAULT_PRECEDENCE,
+        streaming: bool = False,
+        keep_files: bool = False,
+    ):
+        self.roots = roots
+        self.precedence = precedence
+        self.streaming = streaming
+        self.register = None
+        self.documents = None
+        self.scanned = 0
+        self.rejects = 0
+        self.keep_files = keep_files
+        self.files = []
+        self._spill = None
+
+    def scan(self) -> str:
+        """List the roots (again); returns the digest of the names found."""
+        self.close()
+        digest = NameDigest()
+        with metrics.timer("scan"):
+            if self.streaming:
+                self.scanned = self.rejects = 0
+
+                def seen(root, name):
+                    digest.add(name)
+                    self.scanned += 1
+                    if get_drawing_code(name) == "N/A":
+                        self.rejects += 1
+                    if self.keep_files:
+                        self.files.append(self.roots[root] / name)
+
+                self._spill = tempfile.TemporaryDirectory(prefix="doclist-sort-")
+                self.documents = sorted_documents(
+                    self.roots, Path(self._spill.name), SPILL_ROWS, self.precedence,
+                    on_document=seen,
+                )
+            else:
+                self.register = load_register(self.roots, self.precedence)
+                self.scanned = len(self.register)
+                self.rejects = self.register.count_code("N/A")
+                for name in self.register.names:
+                    digest.add(name)
+                if self.keep_files:
+                    self.files = [self.register.path(row) for row in range(len(self.register))]
+        return digest.hexdigest()
+
+    def record_scan(self) -> None:
+        """Count the listing once per build, however often it was taken."""
+        metrics.count("files_scanned", self.scanned)
+        metrics.count("parse_rejects", self.rejects)
+        metrics.gauge("register_documents", self.scanned)
+
+    def write_lists(
+        self,
+        revisions_csv: Path,
+        output_dir: Path,
+        packages: list,
+        parts: int = 1,
+        snapshot: Optional[Path] = None,
+    ) -> None:
+        """
+        Write document_list_<pkg>.tex (and its parts) for every package and,
+        with `snapshot`, store the routed register there from the same data.
+        """
+        print(f"Generating document lists ({', '.join(packages)})...")
+        if self.streaming:
+            documents, self.documents = self.documents, None
+            stream_document_lists(
+                self.roots, revisions_csv, output_dir, packages,
+                parts=parts, precedence=self.precedence, documents=documents,
+                snapshot=snapshot,
+            )
+            return
+
+        revisions = load_revision_data(revisions_csv)
+        write_document_lists(self.register, revisions, output_dir, packages, parts)
+        if snapshot is not None:
+            with metrics.timer("snapshot"):
+                write_snapshot(snapshot, snapshot_rows(self.register, revisions))
+
+    def export_transmittals(self, transmittal_dir: Path, packages: list) -> None:
+        """Lay out per-package transmittal folders of the listed documents."""
+        print("Exporting transmittal folders...")
+        export_transmittals(sorted(self.files), transmittal_dir, packages)
+
+    def close(self) -> None:
+        self.register = None
+        self.documents = None
+        self.files = []
+        if self._spill is not None:
+            self._spill.cleanup()
+            self._spill = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def input_key(
+    names: str,
+    documents_dirs: list,
+    revisions_csv: Path,
+    categories: Optional[Path],
+    packages: list,
+    output_dir: Path,
+    result_dir: Path,
+    reproducible: bool,
+    shards: int,
+    engine: str,
+    since: Optional[Path] = None,
+    precedence: str = DEFAULT_PRECEDENCE,
+) -> str:
+    """
+    Key of everything a build depends on: the listed names, small inputs by
+    content and the routing and list code by source.
+    """
+    digests = [
+        file_digest(path) if path.exists() else ""
+        for path in (revisions_csv, categories, PROJECT_META_FILE, PREAMBLE_FILE)
+        if path is not None
+    ]
+    digests.append(routing_digest())
+    digests.append(module_digest(generate_doc_list, report_wrapper))
+    return build_key(
+        names,
+        *digests,
+        ",".join(packages),
+        output_dir,
+        result_dir,
+        reproducible,
+        shards,
+        engine,
+        since,
+        "\n".join(str(root) for root in documents_dirs),
+        precedence,
+    )
+
+
+def report_waiting(key: str):
+    def on_wait(holder: dict) -> None:
+        who = f"pid {holder.get('pid', '?')} on {holder.get('host', '?')}"
+        if holder.get("build_key") == key:
+            print(f"Identical build already running ({who}); waiting for its result...")
+        else:
+            print(f"Waiting for build {who} to finish...")
+    return on_wait
+
+
+def write_change_lists(since: Path, current: Path, packages: list, output_dir: Path) -> dict:
+    """
+    Diff two snapshots and write document_list_<pkg>_changes.tex per
+    package. Returns {pkg: (document list, report title)}.
+    """
+    old = Snapshot(since)
+    changes = package_changes(diff_snapshots(old, Snapshot(current)), packages)
+    label = time.strftime("%Y-%m-%d", time.localtime(old.created))
+
+    lists = {}
+    for pkg in packages:
+        out = output_dir / f"document_list_{pkg}_changes.tex"
+        write_latex_rows(delta_groups(changes[pkg]), out)
+        print(f"Changes since {label} for {pkg}: {change_counts(changes[pkg])}")
+        lists[pkg] = (out, f"{PACKAGES[pkg]['title']} -- changes since {label}")
+    return lists
 
 
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Generate drawing lists and build report PDFs."
     )
     parser.add_argument(
         "--documents-dir",
-        type=Path,
-        help="Optional folder containing drawing/document files.",
+        action="append",
+        help=(
+            "Optional folder containing drawing/document files. Repeat it or pass "
+            "a glob pattern to list several folders (e.g. per-discipline shares) "
+            "concurrently."
+        ),
+    )
+    parser.add_argument(
+        "--precedence",
+        choices=PRECEDENCE,
+        default=DEFAULT_PRECEDENCE,
+        help=(
+            "Copy used when a drawing id is found in several document folders: "
+            "the first folder given or the newest file (default: %(default)s)."
+        ),
     )
     parser.add_argument(
         "--revisions-csv",
@@ -168,18 +758,109 @@ def main():
         type=Path,
         help="Optional output folder for generated PDFs.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--transmittal-dir",
+        type=Path,
+        help=(
+            "Optional folder for per-package transmittal copies of the routed "
+            "documents (hardlinked/reflinked where possible)."
+        ),
+    )
+    parser.add_argument(
+        "--categories",
+        type=Path,
+        help="Optional project category registry (.json or .toml).",
+    )
+    parser.add_argument(
+        "--packages",
+        help=(
+            "Comma-separated packages to build, e.g. for_manufacture. "
+            f"Defaults to all: {', '.join(PACKAGES)}."
+        ),
+    )
+    parser.add_argument(
+        "--reproducible",
+        action="store_true",
+        help=(
+            "Pin PDF dates and trailer IDs so identical inputs give "
+            "byte-identical reports. Uses SOURCE_DATE_EPOCH if set, otherwise "
+            "the latest issue date in the revisions CSV."
+        ),
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Generate document lists in bounded memory (very large registers).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"TeX runs at once across packages (default: {DEFAULT_JOBS}).",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=list(ENGINES),
+        default=DEFAULT_ENGINE,
+        help=(
+            "TeX engine compiling the reports (default: %(default)s). "
+            "Compare them with bench_engines.py."
+        ),
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        nargs="?",
+        const=DEFAULT_JOBS,
+        default=1,
+        help=(
+            "Split each package's list at tank boundaries into up to this many "
+            f"shards compiled in parallel and joined (default without a value: {DEFAULT_JOBS})."
+        ),
+    )
+    parser.add_argument(
+        "--since",
+        help=(
+            "Also build report_<package>_changes.pdf listing documents added, "
+            "removed or revised since this snapshot ('last' for the previous build)."
+        ),
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        type=Path,
+        help=(
+            "Where each build stores its register snapshot. "
+            "Defaults to <result-dir>/snapshots."
+        ),
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild even if the last build had identical inputs.",
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        type=Path,
+        help=(
+            "Write an OpenMetrics textfile and a JSON run record to this folder."
+        ),
+    )
+    args = parser.parse_args(argv)
 
-    documents_dir = None
+    documents_dirs = None
     if args.documents_dir is not None:
-        documents_dir = args.documents_dir.expanduser().resolve()
+        documents_dirs = resolve_roots(args.documents_dir)
+        if not documents_dirs:
+            raise SystemExit("No document folder found.")
+    roots = documents_dirs or [DEFAULT_DOCUMENTS_DIR]
 
-    revisions_csv = None
+    revisions_csv = DEFAULT_REVISIONS_CSV
     if args.revisions_csv is not None:
         revisions_csv = args.revisions_csv.expanduser().resolve()
-    elif documents_dir is not None:
-        # When using an external documents folder, default revisions next to it.
-        revisions_csv = documents_dir / "revisions.csv"
+    elif documents_dirs is not None:
+        # When using an external documents folder, default revisions next to
+        # the first one.
+        revisions_csv = documents_dirs[0] / "revisions.csv"
 
     output_dir = None
     if args.output_dir is not None:
@@ -191,19 +872,126 @@ def main():
     result_dir = RESULT_DIR
     if args.result_dir is not None:
         result_dir = args.result_dir.expanduser().resolve()
-    elif documents_dir is not None:
+    elif documents_dirs is not None:
         # When using an external documents folder, default PDF output next to input.
-        result_dir = documents_dir
+        result_dir = documents_dirs[0]
     result_dir = ensure_writable_output_dir(result_dir, RESULT_DIR)
 
-    generate_document_list(
-        documents_dir=documents_dir,
-        revisions_csv=revisions_csv,
-        output_dir=output_dir,
+    categories = None
+    if args.categories is not None:
+        categories = args.categories.expanduser().resolve()
+
+    packages = parse_packages(args.packages)
+    engine = get_engine(args.engine)
+    if not engine.available():
+        raise SystemExit(f"{engine.name} needs '{engine.program}', which is not installed.")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if categories is not None:
+        # Documents are listed and routed in this process
+        use_registry(categories)
+
+    transmittal_dir = None
+    if args.transmittal_dir is not None:
+        transmittal_dir = args.transmittal_dir.expanduser().resolve()
+        transmittal_dir.mkdir(parents=True, exist_ok=True)
+
+    snapshot_dir = result_dir / "snapshots"
+    if args.snapshot_dir is not None:
+        snapshot_dir = args.snapshot_dir.expanduser().resolve()
+
+    key_inputs = (
+        roots,
+        revisions_csv,
+        categories,
+        packages,
+        output_dir,
+        result_dir,
+        args.reproducible,
+        max(1, args.shards),
+        args.engine,
+    )
+    locked = [*roots, output_dir, result_dir]
+    if transmittal_dir is not None:
+        locked.append(transmittal_dir)
+
+    project = metrics.project_name(roots[0])
+    listing = DocumentListing(
+        roots, args.precedence, args.streaming, keep_files=transmittal_dir is not None
     )
-    for tex_file in TEX_FILES:
-        run_pdflatex(tex_file)
-        move_outputs(tex_file, result_dir=result_dir)
+    with metrics.recording("build", args.metrics_dir, project), listing:
+        # Listed once: the same listing keys the build and feeds the lists
+        names = listing.scan()
+        key = input_key(names, *key_inputs, since=args.since, precedence=args.precedence)
+
+        # One build at a time per folder. A build waiting behind an identical
+        # one picks up its published PDFs instead of compiling again.
+        locks = FolderLocks(locked, build_key=key)
+        try:
+            if locks.acquire(on_wait=report_waiting(key)):
+                # Inputs may have changed while waiting (e.g. a revisions sync)
+                names = listing.scan()
+            listing.record_scan()
+
+            since = None
+            if args.since == "last":
+                since = latest_snapshot(snapshot_dir)
+                if since is None:
+                    print(f"Warning: No snapshot in '{snapshot_dir}' yet; skipping changes report.")
+            elif args.since is not None:
+                since = Path(args.since).expanduser().resolve()
+
+            key = input_key(names, *key_inputs, since=since, precedence=args.precedence)
+            outputs = None if args.force else completed_outputs(result_dir, key)
+            if outputs is not None:
+                metrics.count("cache_hits", cache="build")
+                print(f"Inputs unchanged; reusing {len(outputs)} PDF(s) in {result_dir}")
+            else:
+                metrics.count("cache_misses", cache="build")
+                epoch = None
+                if args.reproducible:
+                    epoch = source_date_epoch(revisions_csv)
+
+                # Saved with the lists, before compiling, so the changes report
+                # can diff against it; dropped again if the build fails.
+                snapshot = new_snapshot_path(snapshot_dir)
+                try:
+                    with metrics.timer("generate"):
+                        listing.write_lists(
+                            revisions_csv, output_dir, packages, max(1, args.shards),
+                            snapshot=snapshot,
+                        )
+
+                    changes = None
+                    if since is not None:
+                        with metrics.timer("changes"):
+                            changes = write_change_lists(since, snapshot, packages, output_dir)
+
+                    transferred = asyncio.run(build_packages(
+                        packages,
+                        jobs=max(1, args.jobs),
+                        output_dir=output_dir,
+                        result_dir=result_dir,
+                        epoch=epoch,
+                        changes=changes,
+                        shards=max(1, args.shards),
+                        engine=engine,
+                    ))
+                except BaseException:
+                    snapshot.unlink(missing_ok=True)
+                    raise
+                print(f"Published {transferred} bytes to {result_dir}")
+                print(f"Saved register snapshot {snapshot}")
+
+                outputs = [f"report_{pkg}.pdf" for pkg in packages]
+                if changes:
+                    outputs += [f"report_{pkg}_changes.pdf" for pkg in changes]
+                record_build(result_dir, key, outputs)
+
+            if transmittal_dir is not None:
+                with metrics.timer("transmittal"):
+                    listing.export_transmittals(transmittal_dir, packages)
+        finally:
+            locks.release()
     print("Build completed successfully")
 
 
@@ -0,0 +1,368 @@
+import argparse
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from config import CACHE_DIR, PACKAGES
+from discovery import DEFAULT_PRECEDENCE, LIST_JOBS, PRECEDENCE, newest_roots
+from fileops import file_digest, listing_digest
+from filename_parser import get_project_number
+from generate_doc_list import (
+    load_register,
+    load_revision_data,
+    parse_packages,
+    write_latex_list,
+)
+from register import PACKAGE_BITS, ColumnarRegister, routing_digest
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_DB = CACHE_DIR / "catalog.sqlite"
+DEFAULT_DOCUMENTS_DIR = PROJECT_ROOT / "data" / "documents"
+DEFAULT_REVISIONS_CSV = PROJECT_ROOT / "data" / "revisions.csv"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    snapshot TEXT NOT NULL,
+    refreshed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    folder TEXT NOT NULL REFERENCES folders(path) ON DELETE CASCADE,
+    filename TEXT NOT NULL,
+    project TEXT NOT NULL,
+    drawing_id TEXT NOT NULL,
+    tank TEXT NOT NULL,
+    code TEXT NOT NULL,
+    rev TEXT NOT NULL,
+    issue_date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (folder, filename)
+);
+CREATE TABLE IF NOT EXISTS document_packages (
+    folder TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    package TEXT NOT NULL,
+    PRIMARY KEY (package, folder, filename),
+    FOREIGN KEY (folder, filename)
+        REFERENCES documents(folder, filename) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS documents_project_code ON documents(project, code);
+CREATE INDEX IF NOT EXISTS documents_code ON documents(code);
+"""
+
+
+# ---------------------------------------------------------------------------
+# Database
+# ---------------------------------------------------------------------------
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def ingest_folder(
+    connection: sqlite3.Connection,
+    documents_dir: Path,
+    revisions_csv: Path,
+    force: bool = False,
+    categories: Optional[Path] = None,
+) -> bool:
+    """
+    Replace the catalog rows of one documents folder; returns False when its
+    inputs are unchanged.
+    """
+    folder = str(documents_dir)
+    snapshot = hashlib.sha256("\0".join([
+        listing_digest(documents_dir, revisions_csv),
+        file_digest(categories) if categories is not None else "",
+        routing_digest(),
+    ]).encode("utf-8")).hexdigest()
+
+    stored = connection.execute(
+        "SELECT snapshot FROM folders WHERE path = ?", (folder,)
+    ).fetchone()
+    if stored is not None and stored[0] == snapshot and not force:
+        return False
+
+    register = load_register(documents_dir)
+    revisions = load_revision_data(revisions_csv)
+
+    documents = []
+    packages = []
+    for row, name in enumerate(register.names):
+        drawing_id = Path(name).stem.split("_", 1)[0]
+        revision = revisions.get(drawing_id, {})
+        tank = register.tanks[register.tank_id[row]]
+        documents.append((
+            folder,
+            name,
+            get_project_number(name),
+            drawing_id,
+            "00" if tank == "General" else tank,
+            register.codes[register.code_id[row]],
+            revision.get("rev") or "",
+            revision.get("issue_date") or "",
+            (revision.get("status") or "").strip(),
+        ))
+        mask = register.packages[row]
+        packages.extend(
+            (folder, name, pkg) for pkg, bit in PACKAGE_BITS.items() if mask & bit
+        )
+
+    with connection:
+        connection.execute("DELETE FROM folders WHERE path = ?", (folder,))
+        connection.execute(
+            "INSERT INTO folders (path, snapshot, refreshed_at) VALUES (?, ?, ?)",
+            (folder, snapshot, datetime.now(timezone.utc).isoformat(timespec="seconds")),
+        )
+        connection.executemany(
+            "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", documents
+        )
+        connection.executemany(
+            "INSERT INTO document_packages VALUES (?, ?, ?)", packages
+        )
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+def print_rows(header, rows) -> None:
+    rows = [[str(value) for value in row] for row in rows]
+    widths = [max([len(h)] + [len(row[i]) for row in rows]) for i, h in enumerate(header)]
+    print("  ".join(h.ljust(w) for h, w in zip(header, widths)).rstrip())
+    for row in rows:
+        print("  ".join(value.ljust(w) for value, w in zip(row, widths)).rstrip())
+
+
+def summary(connection: sqlite3.Connection) -> None:
+    rows = connection.execute(
+        """
+        SELECT project,
+               COUNT(*),
+               SUM(status = ''),
+               COUNT(DISTINCT folder)
+        FROM documents
+        GROUP BY project
+        ORDER BY project
+        """
+    ).fetchall()
+    print_rows(("project", "documents", "without status", "folders"), rows)
+
+
+def outstanding(connection: sqlite3.Connection, code: str) -> None:
+    """
+    Projects where `code` is missing or every copy of it still has no status.
+    """
+    rows = connection.execute(
+        """
+        SELECT p.project,
+               COALESCE(MAX(d.status <> ''), 0) AS issued,
+               COUNT(d.filename) AS copies
+        FROM (SELECT DISTINCT project FROM documents) AS p
+        LEFT JOIN documents AS d
+               ON d.project = p.project AND d.code = ?
+        GROUP BY p.project
+        HAVING issued = 0
+        ORDER BY p.project
+        """,
+        (code.upper(),),
+    ).fetchall()
+    print_rows(
+        ("project", "state"),
+        [(project, "no status" if copies else "missing") for project, _, copies in rows],
+    )
+    print(f"{len(rows)} project(s) with {code.upper()} outstanding")
+
+
+def unique_rows(rows: list, precedence: str = DEFAULT_PRECEDENCE) -> list:
+    """
+    Rows (folder first) keeping each drawing id from one folder only, chosen
+    as in discovery.discover with the folders in path order.
+    """
+    folders = sorted({row[0] for row in rows})
+    index = {folder: i for i, folder in enumerate(folders)}
+
+    first = {}
+    contested = set()
+    for row in rows:
+        if first.setdefault(row[3], index[row[0]]) != index[row[0]]:
+            contested.add(row[3])
+
+    winners = first
+    if contested:
+        print(
+            f"{len(contested)} drawing id(s) catalogued from several folders; "
+            f"using the {precedence} copy"
+        )
+        if precedence == "newest":
+            listings = [[] for _ in folders]
+            for row in rows:
+                listings[index[row[0]]].append(row[2])
+            roots = [Path(folder) for folder in folders]
+            winners = {**first, **newest_roots(roots, listings, contested, LIST_JOBS)}
+
+    return [row for row in rows if winners[row[3]] == index[row[0]]]
+
+
+def combined_register(
+    connection: sqlite3.Connection,
+    pkg: str,
+    output_file: Path,
+    precedence: str = DEFAULT_PRECEDENCE,
+) -> None:
+    """Write one LaTeX list for `pkg` covering every catalogued project."""
+    rows = connection.execute(
+        """
+        SELECT d.folder, d.project, d.filename, d.drawing_id,
+               d.rev, d.issue_date, d.status
+        FROM document_packages AS p
+        JOIN documents AS d USING (folder, filename)
+        WHERE p.package = ?
+        ORDER BY d.project
+        """,
+        (pkg,),
+    ).fetchall()
+    rows = [row[1:] for row in unique_rows(rows, precedence)]
+
+    names_by_project = {}
+    revisions = {}
+    for project, name, drawing_id, rev, issue_date, status in rows:
+        names_by_project.setdefault(project, []).append(name)
+        revisions[drawing_id] = {"rev": rev, "issue_date": issue_date, "status": status}
+
+    sections = []
+    for project, names in names_by_project.items():
+        # Re-sort each project with the regular drawing list ordering
+        register = ColumnarRegister.from_names(Path(), names)
+        for label, files in register.sections(pkg):
+            sections.append((f"{project} – {label}", files))
+
+    write_latex_list(sections, output_file, revisions, PACKAGES[pkg]["title"])
+    print(f"Wrote {len(rows)} documents from {len(names_by_project)} projects to {output_file}")
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Portfolio-wide catalog of document registers (SQLite)."
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=DEFAULT_DB,
+        help="Catalog database path.",
+    )
+    parser.add_argument(
+        "--categories",
+        type=Path,
+        help="Optional category registry (.json or .toml) used for routing.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser(
+        "ingest", help="Ingest documents folders, refreshing only changed ones."
+    )
+    ingest.add_argument("documents_dirs", type=Path, nargs="+")
+    ingest.add_argument(
+        "--revisions-csv",
+        type=Path,
+        help=(
+            "Revisions CSV for every folder ingested. Defaults to "
+            "<documents-dir>/revisions.csv for an external documents folder, "
+            "as in build.py."
+        ),
+    )
+    ingest.add_argument(
+        "--force", action="store_true", help="Re-ingest unchanged folders too."
+    )
+
+    commands.add_parser("summary", help="Document counts per project.")
+
+    missing = commands.add_parser(
+        "outstanding", help="Projects where a code is missing or has no status."
+    )
+    missing.add_argument("--code", required=True, help="Document code, e.g. C110.")
+
+    combined = commands.add_parser(
+        "register", help="Write a combined LaTeX list for one package."
+    )
+    combined.add_argument("--package", required=True, help=", ".join(PACKAGES))
+    combined.add_argument("--output", type=Path, required=True, help="Output .tex file.")
+    combined.add_argument(
+        "--precedence",
+        choices=PRECEDENCE,
+        default=DEFAULT_PRECEDENCE,
+        help=(
+            "Copy listed when a drawing id is catalogued from several folders: "
+            "the folder whose path sorts first or the newest file "
+            "(default: %(default)s)."
+        ),
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    categories = None
+    if args.categories is not None:
+        from category_registry import use_registry
+
+        categories = args.categories.expanduser().resolve()
+        use_registry(categories)
+
+    connection = connect(args.db.expanduser().resolve())
+    try:
+        if args.command == "ingest":
+            for documents_dir in args.documents_dirs:
+                documents_dir = documents_dir.expanduser().resolve()
+                if args.revisions_csv is not None:
+                    revisions_csv = args.revisions_csv.expanduser().resolve()
+                elif documents_dir != DEFAULT_DOCUMENTS_DIR:
+                    # Same default as build.py for an external documents folder
+                    revisions_csv = documents_dir / "revisions.csv"
+                else:
+                    revisions_csv = DEFAULT_REVISIONS_CSV
+                if ingest_folder(
+                    connection, documents_dir, revisions_csv, args.force, categories
+                ):
+                    print(f"Ingested {documents_dir}")
+                else:
+                    print(f"Unchanged {documents_dir}")
+        elif args.command == "summary":
+            summary(connection)
+        elif args.command == "outstanding":
+            outstanding(connection, args.code)
+        elif args.command == "register":
+            packages = parse_packages(args.package)
+            if len(packages) != 1:
+                raise SystemExit("--package takes exactly one package")
+            combined_register(
+                connection,
+                packages[0],
+                args.output.expanduser().resolve(),
+                args.precedence,
+            )
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import pickle
+import sys
+from pathlib import Path
+
+import config
+import drawing_categories
+import metrics
+import rules
+from config import CACHE_DIR, PACKAGES
+from fileops import module_digest
+from rules import use_rules, validate_rules
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+# Bump when the compiled form changes so stale snapshots are ignored
+SNAPSHOT_VERSION = 2
+SNAPSHOT_DIR = CACHE_DIR / "registries"
+
+# File section -> registry in drawing_categories
+SECTIONS = {
+    "drawing_categories": "DRAWING_CATEGORY",
+    "document_categories": "DOCUMENT_CATEGORY",
+    "calculation_categories": "CALCULATION_CATEGORY",
+    "model_categories": "MODEL_CATEGORY",
+    "protocol_categories": "PROTOCOL_CATEGORY",
+}
+
+BASES = {"builtin", "empty"}
+
+# Pristine copy of the built-in registries, taken before any project file is
+# applied over them
+BUILTIN = {
+    name: dict(getattr(drawing_categories, name)) for name in SECTIONS.values()
+}
+
+
+# ---------------------------------------------------------------------------
+# Parsing and validation
+# ---------------------------------------------------------------------------
+
+def _read_file(path: Path, data: bytes) -> dict:
+    if path.suffix.lower() == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            raise ValueError(f"Reading {path} requires Python 3.11+ (tomllib).")
+        return tomllib.loads(data.decode("utf-8"))
+
+    if path.suffix.lower() == ".json":
+        return json.loads(data.decode("utf-8"))
+
+    raise ValueError(f"Unsupported registry format '{path.suffix}' for {path}")
+
+
+def _valid_code(section: str, code: str) -> bool:
+    if section == "drawing_categories":
+        return len(code) == 2 and code.isdigit()
+    return len(code) == 4 and code[0].isalpha() and code[0].isupper() and code[1:].isdigit()
+
+
+def _compile_entry(path: Path, section: str, code: str, entry) -> dict:
+    where = f"{path}: {section}.{code}"
+
+    if not _valid_code(section, code):
+        expected = "2 digits" if section == "drawing_categories" else "1 letter + 3 digits"
+        raise ValueError(f"{where}: code must be {expected}")
+    if not isinstance(entry, dict):
+        raise ValueError(f"{where}: expected a table of fields")
+
+    allowed = {"label", "description", "packages"}
+    if section == "drawing_categories":
+        allowed.add("element_based")
+    unknown = set(entry) - allowed
+    if unknown:
+        raise ValueError(f"{where}: unknown field(s) {', '.join(sorted(unknown))}")
+
+    label = entry.get("label")
+    if not isinstance(label, str) or not label:
+        raise ValueError(f"{where}: 'label' must be a non-empty string")
+
+    packages = entry.get("packages")
+    if not isinstance(packages, list) or not all(isinstance(p, str) for p in packages):
+        raise ValueError(f"{where}: 'packages' must be a list of package names")
+    unknown = set(packages) - set(PACKAGES)
+    if unknown:
+        raise ValueError(f"{where}: unknown package(s) {', '.join(sorted(unknown))}")
+
+    compiled = {"label": label, "packages": set(packages)}
+
+    if section == "drawing_categories":
+        element_based = entry.get("element_based")
+        if not isinstance(element_based, bool):
+            raise ValueError(f"{where}: 'element_based' must be true or false")
+        compiled["element_based"] = element_based
+
+    if "description" in entry:
+        if not isinstance(entry["description"], str):
+            raise ValueError(f"{where}: 'description' must be a string")
+        compiled["description"] = entry["description"]
+
+    return compiled
+
+
+def compile_registry(path: Path, data: bytes) -> dict:
+    """
+    Parse and validate a registry file into {"base", "rules", registry name:
+    {code: meta}} holding only the entries it defines.
+    """
+    raw = _read_file(path, data)
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path}: expected a table at the top level")
+
+    unknown = set(raw) - set(SECTIONS) - {"base", "rules"}
+    if unknown:
+        raise ValueError(f"{path}: unknown section(s) {', '.join(sorted(unknown))}")
+
+    base = raw.get("base", "builtin")
+    if base not in BASES:
+        raise ValueError(f"{path}: 'base' must be one of {', '.join(sorted(BASES))}")
+
+    compiled = {"base": base, "rules": None}
+    if "rules" in raw:
+        compiled["rules"] = validate_rules(raw["rules"], f"{path}: rules")
+
+    for section, name in SECTIONS.items():
+        registry = {}
+        entries = raw.get(section, {})
+        if not isinstance(entries, dict):
+            raise ValueError(f"{path}: '{section}' must be a table keyed by code")
+        for code, entry in entries.items():
+            registry[code] = _compile_entry(path, section, code, entry)
+
+        compiled[name] = registry
+
+    return compiled
+
+
+# ---------------------------------------------------------------------------
+# Snapshot cache
+# ---------------------------------------------------------------------------
+
+def load_registry(path: Path) -> dict:
+    """
+    Return the compiled registry for `path`, cached by the file's bytes and
+    the code it is validated and merged against (packages, default rules).
+    """
+    data = path.read_bytes()
+    digest = hashlib.sha256(data)
+    digest.update(module_digest(config, rules, sys.modules[__name__]).encode())
+    key = digest.hexdigest()
+    snapshot = SNAPSHOT_DIR / f"{key}.v{SNAPSHOT_VERSION}.pickle"
+
+    try:
+        with snapshot.open("rb") as f:
+            compiled = pickle.load(f)
+        metrics.count("cache_hits", cache="registry")
+        return compiled
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    metrics.count("cache_misses", cache="registry")
+    compiled = compile_registry(path, data)
+
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        temp = snapshot.with_suffix(".tmp")
+        with temp.open("wb") as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        temp.replace(snapshot)
+    except OSError:
+        pass  # caching is best-effort
+
+    return compiled
+
+
+def use_registry(path: Path) -> None:
+    """
+    Replace the active categories (in place) and drawing list rules with
+    those of a registry file.
+    """
+    compiled = load_registry(path)
+
+    for name in SECTIONS.values():
+        registry = getattr(drawing_categories, name)
+        registry.clear()
+        if compiled["base"] == "builtin":
+            registry.update(BUILTIN[name])
+        registry.update(compiled[name])
+
+    drawing_categories.CODE_REGISTRY.clear()
+    for name in SECTIONS.values():
+        if name != "DRAWING_CATEGORY":
+            drawing_categories.CODE_REGISTRY.update(getattr(drawing_categories, name))
+
+    use_rules(compiled["rules"])
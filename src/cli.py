@@ -0,0 +1,72 @@
+import sys
+from importlib import import_module
+from pathlib import Path
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PROG = "doclist"
+
+# Folder (or zipapp) holding the modules; runnable through its __main__.py
+APP_PATH = Path(__file__).resolve().parent
+
+# Subcommand -> (module, summary). Modules are imported only when their
+# subcommand runs, so quick commands never load the build pipeline.
+COMMANDS = {
+    "build": ("build", "Generate lists and build report PDFs."),
+    "generate": ("generate_doc_list", "Generate LaTeX document lists."),
+    "revisions": ("generate_revision_csv", "Create or update the revisions CSV."),
+    "import-xlsx": ("import_xlsx", "Merge an Excel revision register into the CSV."),
+    "query": ("query", "Query the register."),
+    "catalog": ("catalog", "Portfolio catalog of several projects."),
+    "serve": ("serve", "Serve registers over HTTP."),
+    "transmittal": ("transmittal", "Export per-package transmittal folders."),
+    "snapshots": ("snapshots", "Compare two register snapshots."),
+    "texlog": ("texlog", "Summarise TeX log files."),
+    "bench-engines": ("bench_engines", "Time the installed TeX engines."),
+}
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def subcommand(name: str) -> list:
+    """Command line running `name` in a fresh interpreter, from source or zipapp."""
+    return [sys.executable, str(APP_PATH), name]
+
+
+def usage() -> str:
+    width = max(len(name) for name in COMMANDS)
+    lines = [f"usage: {PROG} <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {summary}" for name, (_, summary) in COMMANDS.items()]
+    lines += ["", f"Run '{PROG} <command> --help' for the options of a command."]
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+
+    name, *rest = argv
+    if name not in COMMANDS:
+        print(f"{PROG}: unknown command '{name}'\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module = import_module(COMMANDS[name][0])
+    # argparse and run records read the program name and arguments from here
+    sys.argv = [f"{PROG} {name}", *rest]
+    module.main(rest)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,40 @@
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Derived data (compiled registries, indexes, digests); safe to delete
+CACHE_DIR = PROJECT_ROOT / ".cache"
+
 CSV_DELIMITER = ";"
 CSV_ENCODING = "utf-8"
+
+# Report wrapper settings per package (values are written into TeX as-is)
 PACKAGES = {
-    "for_client": {"title": "Drawing List – For Client"},
-    "for_manufacture": {"title": "Drawing List – For Manufacture"},
-    "for_installation": {"title": "Drawing List – For Installation"},
+    "for_client": {
+        "title": "Drawing List – For Client",
+        "subtitle": "Project Deliverables – For Client Package",
+        "docnumber": "0.0.0",
+        "revision": "A",
+        "revision_date": r"\today",
+        "prepared_by": "LK",
+        "approved_by": "-",
+    },
+    "for_manufacture": {
+        "title": "Drawing List – For Manufacture",
+        "subtitle": "Project Deliverables – For Manufacture Package",
+        "docnumber": "5.4.5",
+        "revision": "01.00",
+        "revision_date": "09.08.22",
+        "prepared_by": "GSK",
+        "approved_by": "RK",
+    },
+    "for_installation": {
+        "title": "Drawing List – For Installation",
+        "subtitle": "Project Deliverables – For Installation Package",
+        "docnumber": "5.4.5",
+        "revision": "01.00",
+        "revision_date": "09.08.22",
+        "prepared_by": "GSK",
+        "approved_by": "RK",
+    },
 }
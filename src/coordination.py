@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import CACHE_DIR
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+LOCK_NAME = ".doclist.lock"
+RECORD_NAME = ".doclist-build.json"
+
+# Used when a folder cannot hold a lock file (read-only share)
+LOCAL_LOCK_DIR = CACHE_DIR / "locks"
+
+POLL_INTERVAL = 1.0          # seconds between lock attempts
+HEARTBEAT_INTERVAL = 60.0    # seconds between touches of a held lock file
+STALE_AFTER = 15 * 60        # locks not touched for this long are abandoned
+
+
+# ---------------------------------------------------------------------------
+# Lock files
+# ---------------------------------------------------------------------------
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != "posix":
+        # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FolderLock:
+    """
+    Exclusive folder lock held as an O_EXCL lock file (atomic on SMB/NFS
+    too), touched while held; stale locks are broken.
+    """
+
+    def __init__(self, folder: Path, build_key: str = ""):
+        self.folder = folder
+        self.build_key = build_key
+        self.path = self._lock_path(folder)
+        self.held = False
+        self.token = None
+        self._stop_heartbeat = None
+
+    @staticmethod
+    def _lock_path(folder: Path) -> Path:
+        if os.access(folder, os.W_OK):
+            return folder / LOCK_NAME
+        digest = hashlib.sha256(str(folder).encode("utf-8")).hexdigest()[:16]
+        LOCAL_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+        return LOCAL_LOCK_DIR / f"{digest}.lock"
+
+    @staticmethod
+    def _read(path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def holder(self) -> Optional[dict]:
+        return self._read(self.path)
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[tuple]:
+        """Identifies one lock file: its mtime and its holder's token."""
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return None
+        return mtime, (FolderLock._read(path) or {}).get("token")
+
+    @staticmethod
+    def _is_stale(path: Path) -> bool:
+        try:
+            age = time.time() - path.stat().st_mtime
+        except OSError:
+            return False
+        if age > STALE_AFTER:
+            return True
+        holder = FolderLock._read(path)
+        if holder and holder.get("host") == socket.gethostname():
+            return not _pid_alive(int(holder.get("pid", 0)))
+        return False
+
+    def _break_stale(self, stamp: tuple) -> None:
+        """Remove the stale lock file identified by `stamp`, one waiter at a time."""
+        breaking = self.path.with_name(f"{self.path.name}.break")
+        try:
+            fd = os.open(breaking, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if self._is_stale(breaking):
+                breaking.unlink(missing_ok=True)  # left by a crashed waiter
+            return
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"pid": os.getpid(), "host": socket.gethostname()}, f)
+            # No lock can be taken while the stale file exists and no other
+            # waiter removes it meanwhile, so an unchanged stamp means the
+            # file is still the stale one
+            if self._stamp(self.path) == stamp:
+                print(f"Warning: Breaking stale lock '{self.path}'.")
+                self.path.unlink(missing_ok=True)
+        finally:
+            breaking.unlink(missing_ok=True)
+
+    def try_acquire(self) -> bool:
+        for attempt in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                stamp = self._stamp(self.path)
+                if attempt or stamp is None or not self._is_stale(self.path):
+                    return False
+                self._break_stale(stamp)
+
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{time.time_ns()}"
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "pid": os.getpid(),
+                    "host": socket.gethostname(),
+                    "started": time.time(),
+                    "build_key": self.build_key,
+                    "token": self.token,
+                },
+                f,
+            )
+        self.held = True
+        self._start_heartbeat()
+        return True
+
+    def _start_heartbeat(self) -> None:
+        """Touch the lock file while it is held so it never looks stale."""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                holder = self.holder()
+                if holder is not None and holder.get("token") != self.token:
+                    print(f"Warning: Lost the lock on '{self.folder}' to another process.")
+                    return
+                try:
+                    os.utime(self.path)
+                except OSError:
+                    pass
+
+        self._stop_heartbeat = stop
+        threading.Thread(target=beat, name=f"lock {self.folder}", daemon=True).start()
+
+    def acquire(self, on_wait=None) -> bool:
+        """
+        Block until the lock is held; `on_wait(holder)` is called once.
+        Returns whether it had to wait.
+        """
+        waited = False
+        while not self.try_acquire():
+            if not waited and on_wait is not None:
+                on_wait(self.holder() or {})
+            waited = True
+            time.sleep(POLL_INTERVAL)
+        return waited
+
+    def release(self) -> None:
+        if not self.held:
+            return
+        self._stop_heartbeat.set()
+        # Leave a lock that was broken and taken by someone else alone
+        holder = self.holder()
+        if holder is not None and holder.get("token") == self.token:
+            self.path.unlink(missing_ok=True)
+        self.held = False
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class FolderLocks:
+    """
+    Locks on several folders, taken in sorted path order so two builds
+    locking overlapping folders cannot deadlock.
+    """
+
+    def __init__(self, folders, build_key: str = ""):
+        unique = sorted({Path(folder) for folder in folders}, key=str)
+        self.locks = [FolderLock(folder, build_key) for folder in unique]
+
+    def acquire(self, on_wait=None) -> bool:
+        """
+        Take every lock, or none: on failure the ones held are released.
+        Returns whether any of them had to be waited for.
+        """
+        waited = False
+        try:
+            for lock in self.locks:
+                waited = lock.acquire(on_wait) or waited
+        except BaseException:
+            self.release()
+            raise
+        return waited
+
+    def release(self) -> None:
+        for lock in reversed(self.locks):
+            lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# ---------------------------------------------------------------------------
+# Build records
+# ---------------------------------------------------------------------------
+
+def build_key(*parts) -> str:
+    """Digest identifying a build by its inputs and options."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def completed_outputs(result_dir: Path, key: str) -> Optional[list]:
+    """
+    Outputs of the last build published to `result_dir` if it had the same
+    key and all of them still exist, else None.
+    """
+    try:
+        record = json.loads((result_dir / RECORD_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if record.get("build_key") != key:
+        return None
+    outputs = [result_dir / name for name in record.get("outputs", [])]
+    if not outputs or not all(path.exists() for path in outputs):
+        return None
+    return outputs
+
+
+def record_build(result_dir: Path, key: str, outputs) -> None:
+    record = {
+        "build_key": key,
+        "finished": time.time(),
+        "outputs": [Path(path).name for path in outputs],
+    }
+    temp = result_dir / f"{RECORD_NAME}.{os.getpid()}.tmp"
+    try:
+        temp.write_text(json.dumps(record), encoding="utf-8")
+        os.replace(temp, result_dir / RECORD_NAME)
+    except OSError:
+        temp.unlink(missing_ok=True)
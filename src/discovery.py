@@ -0,0 +1,161 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+EXTENSIONS = {".pdf", ".tex", ".rvt"}
+
+# Folders listed (and files stat'ed) at once. Listing a share is bound by
+# network round-trips rather than CPU, so this is well above the CPU count.
+LIST_JOBS = 16
+
+# Which copy of a drawing found under several roots is used:
+#   first  - the one in the root given first
+#   newest - the one whose files were modified last (ties: first root)
+PRECEDENCE = ("first", "newest")
+DEFAULT_PRECEDENCE = "first"
+
+GLOB_CHARS = set("*?[")
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def drawing_id(name: str) -> str:
+    return os.path.splitext(name)[0].split("_", 1)[0]
+
+
+def iter_document_names(folder: Path):
+    """Yield the names of valid document files in folder, unsorted."""
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if (
+                entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in EXTENSIONS
+            ):
+                yield entry.name
+
+
+def as_roots(folders) -> list:
+    """A single folder or an iterable of folders as a list of roots."""
+    if isinstance(folders, (str, os.PathLike)):
+        return [Path(folders)]
+    return [Path(folder) for folder in folders]
+
+
+def resolve_roots(values) -> list:
+    """
+    Document roots named on the command line, in order and without repeats.
+    Existing paths are taken literally; other glob patterns are expanded.
+    """
+    roots = []
+    for value in values:
+        text = os.path.expanduser(str(value))
+        if GLOB_CHARS.intersection(text) and not os.path.exists(text):
+            matches = [
+                Path(match) for match in sorted(glob.glob(text, recursive=True))
+                if os.path.isdir(match)
+            ]
+            if not matches:
+                print(f"Warning: no document folder matches {value}")
+        else:
+            matches = [Path(text)]
+        for match in matches:
+            root = match.resolve()
+            if root not in roots:
+                roots.append(root)
+    return roots
+
+
+def list_root(root: Path) -> list:
+    """Document names in one root; empty (with a warning) when it is missing."""
+    if not root.exists():
+        print(f"Warning: document folder not found: {root}")
+        return []
+    return list(iter_document_names(root))
+
+
+def _mtime(path: Path) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+
+def newest_roots(roots: list, listings: list, contested: set, jobs: int) -> dict:
+    """Drawing id -> index of the root holding its most recently modified file."""
+    candidates = [
+        (drawing_id(name), index, roots[index] / name)
+        for index, names in enumerate(listings)
+        for name in names
+        if drawing_id(name) in contested
+    ]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        mtimes = pool.map(_mtime, [path for _, _, path in candidates])
+
+    newest = {}
+    for (document_id, index, _), mtime in zip(candidates, mtimes):
+        # Negated index: on equal times the earlier root wins
+        key = (mtime, -index)
+        if document_id not in newest or key > newest[document_id]:
+            newest[document_id] = key
+    return {document_id: -key[1] for document_id, key in newest.items()}
+
+
+# ---------------------------------------------------------------------------
+# Discovery
+# ---------------------------------------------------------------------------
+
+def discover(
+    roots: list,
+    precedence: str = DEFAULT_PRECEDENCE,
+    jobs: int = LIST_JOBS,
+    quiet: bool = False,
+):
+    """
+    Yield (root index, name) for every document under `roots`; a drawing id
+    found under several roots comes from the one `precedence` picks.
+    """
+    if precedence not in PRECEDENCE:
+        raise ValueError(f"Unknown precedence: {precedence}")
+    if len(roots) == 1:
+        root = roots[0]
+        if not root.exists():
+            print(f"Warning: document folder not found: {root}")
+            return
+        for name in iter_document_names(root):
+            yield 0, name
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(roots)))) as pool:
+        listings = list(pool.map(list_root, roots))
+
+    # Root of the first sighting of each id; ids seen under another root too
+    first = {}
+    contested = set()
+    for index, names in enumerate(listings):
+        for name in names:
+            document_id = drawing_id(name)
+            if first.setdefault(document_id, index) != index:
+                contested.add(document_id)
+
+    winners = first
+    if contested:
+        if not quiet:
+            print(
+                f"{len(contested)} drawing id(s) found in several document folders; "
+                f"using the {precedence} copy"
+            )
+        if precedence == "newest":
+            winners = {**first, **newest_roots(roots, listings, contested, jobs)}
+
+    for index, names in enumerate(listings):
+        for name in names:
+            if winners[drawing_id(name)] == index:
+                yield index, name
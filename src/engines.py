@@ -0,0 +1,109 @@
+import shutil
+from pathlib import Path
+
+from reproducible import luatex_reproducible_preamble, reproducible_preamble
+
+
+# ---------------------------------------------------------------------------
+# Engines
+# ---------------------------------------------------------------------------
+
+class Engine:
+    """
+    A TeX engine run directly: `runs` passes of `program` with every file
+    written to the output folder.
+    """
+
+    def __init__(self, name: str, program: str, runs: int = 2, id_preamble=None):
+        self.name = name
+        self.program = program
+        self.runs = runs
+        # manifest -> TeX code pinning the PDF trailer ID; None when the
+        # engine derives it from SOURCE_DATE_EPOCH on its own
+        self.id_preamble = id_preamble
+
+    def available(self) -> bool:
+        return shutil.which(self.program) is not None
+
+    def source(self, tex_file: Path, preamble: str) -> str:
+        if preamble:
+            return f"{preamble}\\input{{{tex_file.as_posix()}}}"
+        return str(tex_file)
+
+    def command(self, tex_file: Path, output_dir: Path, preamble: str = "") -> list:
+        return [
+            self.program,
+            "-interaction=nonstopmode",
+            f"-output-directory={output_dir}",
+            f"-jobname={tex_file.stem}",
+            self.source(tex_file, preamble),
+        ]
+
+    def reproducible_preamble(self, manifest: str) -> str:
+        return self.id_preamble(manifest) if self.id_preamble else ""
+
+
+class Latexmk(Engine):
+    """
+    latexmk driving an engine; it decides the number of passes itself, so
+    one run is made. The preamble is passed with -usepretex.
+    """
+
+    def __init__(self, name: str, mode: str, engine: Engine):
+        super().__init__(name, "latexmk", runs=1, id_preamble=engine.id_preamble)
+        self.mode = mode
+        self.engine = engine
+
+    def available(self) -> bool:
+        return super().available() and self.engine.available()
+
+    def command(self, tex_file: Path, output_dir: Path, preamble: str = "") -> list:
+        command = [
+            self.program,
+            self.mode,
+            "-interaction=nonstopmode",
+            f"-output-directory={output_dir}",
+            f"-jobname={tex_file.stem}",
+        ]
+        if preamble:
+            command.append(f"-usepretex={preamble}")
+        command.append(str(tex_file))
+        return command
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PDFLATEX = Engine("pdflatex", "pdflatex", id_preamble=reproducible_preamble)
+LUALATEX = Engine("lualatex", "lualatex", id_preamble=luatex_reproducible_preamble)
+# xdvipdfmx derives a stable trailer ID from SOURCE_DATE_EPOCH
+XELATEX = Engine("xelatex", "xelatex")
+
+ENGINES = {
+    engine.name: engine
+    for engine in (
+        PDFLATEX,
+        LUALATEX,
+        XELATEX,
+        Latexmk("latexmk", "-pdf", PDFLATEX),
+        Latexmk("latexmk-lualatex", "-pdflua", LUALATEX),
+        Latexmk("latexmk-xelatex", "-pdfxe", XELATEX),
+    )
+}
+
+DEFAULT_ENGINE = PDFLATEX.name
+
+
+def get_engine(name: str = DEFAULT_ENGINE) -> Engine:
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise SystemExit(
+            f"Unknown engine: {name}. Available: {', '.join(ENGINES)}"
+        ) from None
+
+
+def available_engines() -> list:
+    """Engines whose programs are installed, in ENGINES order."""
+    return [engine for engine in ENGINES.values() if engine.available()]
@@ -208,3 +208,21 @@ def get_tank_number(filename: str) -> str:
         return tank
 
     return "N/A"
+
+
+# ---------------------------------------------------------------------------
+# Project handling
+# ---------------------------------------------------------------------------
+
+def get_project_number(filename: str) -> str:
+    """
+    Extract the project number (first dash-separated block).
+
+    Returns:
+    - 'AQ430773' for AQ430773-00-45-32-1103.pdf
+    - 'N/A' if missing
+    """
+    parts = _stem_parts(filename)
+    if len(parts) < 2 or not parts[0]:
+        return "N/A"
+    return parts[0]
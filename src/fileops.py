@@ -0,0 +1,235 @@
+import errno
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+CHUNK_SIZE = 1024 * 1024
+
+# Publishing to network shares: errno values worth retrying (dropped SMB
+# sessions, timeouts, servers busy with oplock breaks).
+TRANSIENT_ERRNOS = {
+    errno.EAGAIN,
+    errno.EBUSY,
+    errno.EIO,
+    errno.ETIMEDOUT,
+    errno.ECONNRESET,
+    errno.ECONNABORTED,
+    errno.EHOSTDOWN,
+    errno.EHOSTUNREACH,
+    errno.ENETDOWN,
+    errno.ENETRESET,
+    errno.ENETUNREACH,
+    errno.ESTALE,
+}
+PUBLISH_RETRIES = 4
+PUBLISH_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+
+# ioctl request number for FICLONE (copy-on-write clone on btrfs/XFS/...)
+FICLONE = 0x40049409
+
+
+# ---------------------------------------------------------------------------
+# Content comparison
+# ---------------------------------------------------------------------------
+
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def module_digest(*modules) -> str:
+    """
+    SHA-256 hex digest of the source of loaded modules. It is read through
+    each module's loader, so modules packed in a zipapp are covered too.
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(module.__loader__.get_data(module.__file__))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def same_content(source: Path, destination: Path) -> bool:
+    """
+    True when `destination` already holds the bytes of `source` (sizes
+    compared first, hardlinks accepted).
+    """
+    try:
+        if destination.stat().st_size != source.stat().st_size:
+            return False
+        if os.path.samefile(source, destination):
+            return True
+    except OSError:
+        return False
+
+    return file_digest(source) == file_digest(destination)
+
+
+def listing_digest(folder: Path, *files: Path) -> str:
+    """
+    Digest of a folder listing (name, size, mtime) plus the stat of extra
+    files, cheap enough to recompute on every poll.
+    """
+    digest = hashlib.sha256()
+    if folder.exists():
+        with os.scandir(folder) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_file():
+                    stat = entry.stat()
+                    digest.update(
+                        f"{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode()
+                    )
+    for path in files:
+        if path.exists():
+            stat = path.stat()
+            digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Zero-copy file placement
+# ---------------------------------------------------------------------------
+
+def _reflink(source: Path, destination: Path) -> bool:
+    if fcntl is None:
+        return False
+
+    try:
+        with source.open("rb") as src, destination.open("wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        destination.unlink(missing_ok=True)
+        return False
+
+
+def _hardlink(source: Path, destination: Path) -> bool:
+    try:
+        os.link(source, destination)
+        return True
+    except OSError:
+        return False
+
+
+def copy_chunked(source: Path, destination: Path) -> None:
+    """Copy file contents with copy_file_range, sendfile or a buffered copy."""
+    with source.open("rb") as src, destination.open("wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+
+        for name in ("copy_file_range", "sendfile"):
+            kernel_copy = getattr(os, name, None)
+            if kernel_copy is None:
+                continue
+            try:
+                while remaining > 0:
+                    if name == "sendfile":
+                        sent = kernel_copy(
+                            dst.fileno(), src.fileno(), None,
+                            min(remaining, CHUNK_SIZE),
+                        )
+                    else:
+                        sent = kernel_copy(
+                            src.fileno(), dst.fileno(),
+                            min(remaining, CHUNK_SIZE),
+                        )
+                    if sent == 0:
+                        break
+                    remaining -= sent
+                if remaining == 0:
+                    return
+            except OSError:
+                # Unsupported across these filesystems: restart from scratch
+                # with the next strategy.
+                pass
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+            remaining = os.fstat(src.fileno()).st_size
+
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+
+def link_or_copy(source: Path, destination: Path) -> str:
+    """
+    Place `source` at `destination` by reflink, hardlink or chunked copy;
+    returns the method used.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    destination.unlink(missing_ok=True)
+
+    if _reflink(source, destination):
+        return "reflink"
+    if _hardlink(source, destination):
+        return "hardlink"
+
+    copy_chunked(source, destination)
+    return "copy"
+
+
+# ---------------------------------------------------------------------------
+# Atomic publishing
+# ---------------------------------------------------------------------------
+
+def _is_transient(error: OSError) -> bool:
+    return not isinstance(error, PermissionError) and error.errno in TRANSIENT_ERRNOS
+
+
+def _write_atomic(source: Path, destination: Path) -> None:
+    """
+    Copy `source` next to `destination` under a temporary name, then rename
+    it into place so readers never observe a half-written file.
+    """
+    temp = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    try:
+        copy_chunked(source, temp)
+        os.replace(temp, destination)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+def publish_file(
+    source: Path,
+    destination: Path,
+    retries: int = PUBLISH_RETRIES,
+    backoff: float = PUBLISH_BACKOFF,
+) -> int:
+    """
+    Publish `source` to `destination`, retrying transient errors; returns
+    the bytes written.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    if same_content(source, destination):
+        return 0
+
+    delay = backoff
+    for attempt in range(retries + 1):
+        try:
+            _write_atomic(source, destination)
+            return source.stat().st_size
+        except OSError as error:
+            if attempt == retries or not _is_transient(error):
+                raise
+            print(
+                f"Warning: Writing '{destination}' failed ({error}). "
+                f"Retrying in {delay:.1f}s..."
+            )
+            time.sleep(delay)
+            delay *= 2
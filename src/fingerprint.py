@@ -0,0 +1,110 @@
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config import CACHE_DIR
+from fileops import CHUNK_SIZE
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DIGEST_CACHE_FILE = CACHE_DIR / "digests.json"
+
+# hashlib releases the GIL while hashing large buffers, so threads overlap
+# both I/O and hashing.
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+
+# ---------------------------------------------------------------------------
+# Hashing
+# ---------------------------------------------------------------------------
+
+def mmap_digest(path: Path) -> str:
+    """SHA-256 of a file via a read-only memory map, fed in chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, CHUNK_SIZE):
+                    digest.update(view[offset:offset + CHUNK_SIZE])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+class DigestCache:
+    """
+    Content digests keyed by path and validated by inode, size and mtime,
+    so unchanged files are never read again.
+    """
+
+    def __init__(self, cache_file: Path = DIGEST_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            self.entries = json.loads(cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _stat_key(stat) -> list:
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def lookup(self, path: Path, stat):
+        entry = self.entries.get(str(path))
+        if entry is not None and entry[:3] == self._stat_key(stat):
+            return entry[3]
+        return None
+
+    def store(self, path: Path, stat, digest: str) -> None:
+        self.entries[str(path)] = self._stat_key(stat) + [digest]
+
+    def save(self) -> None:
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.cache_file.with_suffix(".tmp")
+            temp.write_text(json.dumps(self.entries), encoding="utf-8")
+            temp.replace(self.cache_file)
+        except OSError:
+            pass  # best-effort cache
+
+    def digests(self, paths, max_workers: int = MAX_WORKERS) -> dict:
+        """Return {path: digest}, hashing only files whose stat changed."""
+        results = {}
+        pending = []
+        for path in paths:
+            stat = path.stat()
+            digest = self.lookup(path, stat)
+            if digest is None:
+                pending.append((path, stat))
+            else:
+                results[path] = digest
+        self.hits += len(results)
+        self.misses += len(pending)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                hashed = pool.map(mmap_digest, [path for path, _ in pending])
+                for (path, stat), digest in zip(pending, hashed):
+                    self.store(path, stat, digest)
+                    results[path] = digest
+
+        return results
+
+
+def combined_digest(digests) -> str:
+    """One digest for a drawing id published as several files (.pdf + .rvt)."""
+    if len(digests) == 1:
+        return digests[0]
+    return hashlib.sha256("".join(sorted(digests)).encode("ascii")).hexdigest()
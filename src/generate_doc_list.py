@@ -1,16 +1,24 @@
 import argparse
+import os
 from pathlib import Path
 import csv
 
 from filename_parser import (
     describe_drawing,
-    get_tank_number,
     get_drawing_code,
-    category_is_element_based,
     code_packages,
 )
 
-from sorters import panel_type_grouped
+import metrics
+from discovery import (
+    DEFAULT_PRECEDENCE,
+    PRECEDENCE,
+    as_roots,
+    discover,
+    resolve_roots,
+)
+from register import ColumnarRegister
+from rules import active_rules
 from config import CSV_DELIMITER, PACKAGES
 
 
@@ -20,7 +28,8 @@ from config import CSV_DELIMITER, PACKAGES
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
-EXTENSIONS = {".pdf", ".tex", ".rvt"}
+# Table columns, in output order
+ROW_COLUMNS = ("drawing_id", "extension", "description", "rev", "issue_date", "status")
 
 LATEX_SPECIAL_CHARS = {
     "&": r"\&",
@@ -34,6 +43,12 @@ LATEX_SPECIAL_CHARS = {
     "^": r"\textasciicircum{}",
 }
 
+# Closing lines of every list table
+TABLE_END = "\\hline\n\\end{tabularx}\n"
+
+# Bytes copied at a time when splitting a list into parts
+COPY_CHUNK = 1 << 20
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -46,16 +61,44 @@ def escape_latex(text: str) -> str:
     return text
 
 
-def get_documents(folder: Path):
-    """Return all valid document files in folder."""
-    if not folder.exists():
-        print(f"Warning: document folder not found: {folder}")
-        return []
+def get_documents(folders, precedence: str = DEFAULT_PRECEDENCE):
+    """Return all valid document files in one folder or several."""
+    roots = as_roots(folders)
+    return sorted(roots[root] / name for root, name in discover(roots, precedence))
 
-    return sorted(
-        f for f in folder.iterdir()
-        if f.is_file() and f.suffix.lower() in EXTENSIONS
-    )
+
+def load_register(folders, precedence: str = DEFAULT_PRECEDENCE) -> ColumnarRegister:
+    """Scan one folder or several into a columnar register without materialising Paths."""
+    roots = as_roots(folders)
+    return ColumnarRegister.from_documents(roots, discover(roots, precedence))
+
+
+def scan_register(folders, precedence: str = DEFAULT_PRECEDENCE) -> ColumnarRegister:
+    """`load_register`, recording the scan in the run metrics."""
+    with metrics.timer("scan"):
+        register = load_register(folders, precedence)
+    metrics.count("files_scanned", len(register))
+    metrics.count("parse_rejects", register.count_code("N/A"))
+    metrics.gauge("register_documents", len(register))
+    return register
+
+
+def parse_packages(value) -> list:
+    """
+    Turn a comma-separated --packages value into package names, in
+    config.PACKAGES order. None or an empty value selects every package.
+    """
+    if not value:
+        return list(PACKAGES)
+
+    selected = {pkg.strip() for pkg in value.split(",") if pkg.strip()}
+    unknown = selected - set(PACKAGES)
+    if unknown:
+        raise SystemExit(
+            f"Unknown package(s): {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(PACKAGES)}"
+        )
+    return [pkg for pkg in PACKAGES if pkg in selected]
 
 
 def load_revision_data(csv_path: Path) -> dict:
@@ -75,41 +118,56 @@ def load_revision_data(csv_path: Path) -> dict:
         return {row["drawing_id"]: row for row in reader}
 
 
-def sort_key(file: Path):
-    """
-    Sorting strategy:
-    1) non-element-based numeric drawings
-    2) element-based numeric drawings
-    3) alphanumeric categories (D/C/M/P)
-    4) fallback to filename
-    """
-    code = get_drawing_code(file.name)
+def route_files(files) -> dict:
+    """Route files into packages (supports numeric + alphanumeric codes)."""
+    package_files = {pkg: [] for pkg in PACKAGES}
+
+    for file in files:
+        code = get_drawing_code(file.name)
+        for pkg in code_packages(code):
+            if pkg in package_files:
+                package_files[pkg].append(file)
+
+    return package_files
 
-    if code.isdigit():
-        category = code[:2]
-        element_based = category_is_element_based(category)
-        section = 1 if element_based else 0
 
-        if element_based:
-            return (section, panel_type_grouped(file), file.name)
+def list_section(code: str) -> str:
+    """Sub-section heading a drawing code is listed under."""
+    return active_rules().section_label(code)
 
-        return (section, category, code, file.name)
 
-    if len(code) == 4 and code[0].isalpha() and code[1:].isdigit():
-        if code.startswith("M"):
-            return (2, code, file.name)
-        return (3, code, file.name)
+def row_values(name: str, revision: dict) -> dict:
+    """Column values for one drawing list row (unescaped)."""
+    stem, extension = os.path.splitext(name)
 
-    return (4, file.name)
+    return {
+        "drawing_id": stem.split("_", 1)[0],
+        "extension": extension.lstrip(".").lower(),
+        "description": describe_drawing(name),
+        "rev": revision.get("rev", "-") or "-",
+        "issue_date": revision.get("issue_date", "-") or "-",
+        "status": revision.get("status", "-") or "-",
+        "section": list_section(get_drawing_code(name)),
+    }
+
+
+def document_row(file: Path, revisions: dict) -> dict:
+    """Column values for one file, looked up in the revisions dict."""
+    return row_values(file.name, revisions.get(file.stem.split("_", 1)[0], {}))
 
 
 # ---------------------------------------------------------------------------
 # LaTeX output
 # ---------------------------------------------------------------------------
 
-def write_latex_list(sections, output_file: Path, revisions: dict, title: str):
-    """Write a compact LaTeX drawing list table."""
+def write_latex_rows(groups, output_file: Path, group_starts=None) -> int:
+    """
+    Write a drawing list table from (label, rows) groups as the rows arrive;
+    returns the row count. A `group_starts` list collects (offset, rows
+    before) per group for `write_list_parts`.
+    """
     output_file.parent.mkdir(parents=True, exist_ok=True)
+    total = 0
 
     with output_file.open("w", encoding="utf-8") as f:
         f.write("% Auto-generated file — do not edit manually\n")
@@ -133,73 +191,153 @@ def write_latex_list(sections, output_file: Path, revisions: dict, title: str):
 
         row_index = 1
 
-        for group_label, group_files in sections:
+        for group_label, rows in groups:
+            if group_starts is not None:
+                # tell() on a UTF-8 file opened for writing is a byte offset
+                group_starts.append((f.tell(), total))
             write_group_header(group_label)
             current_section = None
             row_index = 1
 
-            for file in group_files:
-                drawing_id = file.stem.split("_", 1)[0]
-                code = get_drawing_code(file.name)
-                if code.isdigit():
-                    category = code[:2]
-                    element_based = category_is_element_based(category)
-                    section = (
-                        "Panel drawings"
-                        if element_based
-                        else "Plan views & sections"
-                    )
-                else:
-                    if code.startswith("M"):
-                        section = "3D models"
-                    else:
-                        section = "Documents, calculation & misc."
-
-                if section != current_section:
-                    write_section_header(section)
-                    current_section = section
+            for row in rows:
+                if row["section"] != current_section:
+                    write_section_header(row["section"])
+                    current_section = row["section"]
                     row_index = 1
 
-                revision = revisions.get(drawing_id, {})
-
-                description = describe_drawing(file.name)
-
-                rev = revision.get("rev", "-") or "-"
-                issue_date = revision.get("issue_date", "-") or "-"
-                status = revision.get("status", "-") or "-"
-                extension = file.suffix.lstrip(".").lower()
-
                 row_index += 1
                 if row_index % 2:
                     f.write("\\rowcolor{gray!10}\n")
 
                 f.write(
-                    f"{escape_latex(drawing_id)} & "
-                    f"{escape_latex(extension)} & "
-                    f"{escape_latex(description)} & "
-                f"{escape_latex(rev)} & "
-                f"{escape_latex(issue_date)} & "
-                f"{escape_latex(status)} \\\\\n"
-            )
+                    " & ".join(escape_latex(row[column]) for column in ROW_COLUMNS)
+                    + " \\\\\n"
+                )
+                total += 1
 
+        f.write(TABLE_END)
+
+    return total
 
-        f.write("\\hline\n")
-        f.write("\\end{tabularx}\n")
+
+def write_latex_list(
+    sections, output_file: Path, revisions: dict, title: str, group_starts=None
+):
+    """Write a compact LaTeX drawing list table."""
+    write_latex_rows(
+        (
+            (group_label, (document_row(file, revisions) for file in group_files))
+            for group_label, group_files in sections
+        ),
+        output_file,
+        group_starts,
+    )
+
+
+def part_cuts(group_starts: list, total: int, parts: int) -> list:
+    """
+    Indexes of the groups that start each part, picked so the parts hold
+    roughly equal numbers of rows. Groups are never split.
+    """
+    cuts = [0]
+    for part in range(1, parts):
+        target = total * part / parts
+        candidates = range(cuts[-1] + 1, len(group_starts))
+        if not candidates:
+            break
+        cuts.append(min(candidates, key=lambda i: abs(group_starts[i][1] - target)))
+    return cuts
+
+
+def list_parts(output_file: Path) -> list:
+    """Part files written by `write_list_parts` for a list, in order."""
+    return sorted(output_file.parent.glob(f"{output_file.stem}_part[0-9]*.tex"))
+
+
+def write_list_parts(output_file: Path, group_starts: list, total: int, parts: int) -> list:
+    """
+    Split a written list at tank boundaries into up to `parts` tables,
+    <stem>_partNN.tex; returns the part files.
+    """
+    for stale in list_parts(output_file):
+        stale.unlink()
+    if parts < 2 or len(group_starts) < 2:
+        return []
+
+    footer = TABLE_END.encode("utf-8")
+    offsets = [group_starts[i][0] for i in part_cuts(group_starts, total, parts)]
+    offsets.append(output_file.stat().st_size - len(footer))
+
+    paths = []
+    with output_file.open("rb") as source:
+        header = source.read(offsets[0])
+        for number, (start, end) in enumerate(zip(offsets, offsets[1:]), 1):
+            path = output_file.with_name(f"{output_file.stem}_part{number:02d}.tex")
+            with path.open("wb") as f:
+                f.write(header)
+                source.seek(start)
+                remaining = end - start
+                while remaining:
+                    chunk = source.read(min(COPY_CHUNK, remaining))
+                    f.write(chunk)
+                    remaining -= len(chunk)
+                f.write(footer)
+            paths.append(path)
+    return paths
+
+
+def report_parts(parts: list, output_file: Path) -> None:
+    if parts:
+        print(f"Split {output_file.name} into {len(parts)} parts")
+
+
+def write_document_lists(
+    register: ColumnarRegister,
+    revisions: dict,
+    output_dir: Path,
+    packages: list,
+    parts: int = 1,
+) -> None:
+    """Write document_list_<pkg>.tex (and its parts) for each package."""
+    for pkg in packages:
+        sections = register.sections(pkg)
+
+        out = output_dir / f"document_list_{pkg}.tex"
+        title = PACKAGES[pkg]["title"]
+
+        group_starts = []
+        with metrics.timer("write", package=pkg):
+            write_latex_list(sections, out, revisions, title, group_starts)
+        total = sum(len(group_files) for _, group_files in sections)
+        metrics.count("rows_written", total, package=pkg)
+        print(f"Wrote {total} documents to {out}")
+        report_parts(write_list_parts(out, group_starts, total, parts), out)
 
 
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
         description="Generate LaTeX drawing/document lists from a document folder."
     )
     parser.add_argument(
         "--documents-dir",
-        type=Path,
-        default=PROJECT_ROOT / "data" / "documents",
-        help="Folder containing drawing/document files.",
+        action="append",
+        help=(
+            "Folder containing drawing/document files (default: data/documents). "
+            "Repeat it or pass a glob pattern to list several folders concurrently."
+        ),
+    )
+    parser.add_argument(
+        "--precedence",
+        choices=PRECEDENCE,
+        default=DEFAULT_PRECEDENCE,
+        help=(
+            "Copy used when a drawing id is found in several document folders: "
+            "the first folder given or the newest file (default: %(default)s)."
+        ),
     )
     parser.add_argument(
         "--revisions-csv",
@@ -213,61 +351,77 @@ def parse_args():
         default=PROJECT_ROOT / "output",
         help="Folder where generated .tex lists are written.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--categories",
+        type=Path,
+        help="Optional project category registry (.json or .toml).",
+    )
+    parser.add_argument(
+        "--packages",
+        help="Comma-separated packages to generate. Defaults to all packages.",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help=(
+            "Bounded-memory mode for very large registers: sort on disk and "
+            "stream rows straight to the .tex files."
+        ),
+    )
+    parser.add_argument(
+        "--spill-rows",
+        type=int,
+        help="Records kept in memory per sort before spilling (with --streaming).",
+    )
+    parser.add_argument(
+        "--parts",
+        type=int,
+        default=1,
+        help=(
+            "Also split each list at tank boundaries into up to this many "
+            "document_list_<pkg>_partNN.tex files of similar size."
+        ),
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        type=Path,
+        help="Write an OpenMetrics textfile and a JSON run record to this folder.",
+    )
+    return parser.parse_args(argv)
+
 
+def main(argv=None):
+    args = parse_args(argv)
+    if args.categories is not None:
+        from category_registry import use_registry
 
-def main():
-    args = parse_args()
-    documents_dir = args.documents_dir.expanduser().resolve()
+        use_registry(args.categories.expanduser().resolve())
+    documents_dirs = resolve_roots(args.documents_dir or [PROJECT_ROOT / "data" / "documents"])
+    if not documents_dirs:
+        raise SystemExit("No document folder found.")
     revisions_csv = args.revisions_csv.expanduser().resolve()
     output_dir = args.output_dir.expanduser().resolve()
+    packages = parse_packages(args.packages)
+
+    project = metrics.project_name(documents_dirs[0])
+    with metrics.recording("generate_doc_list", args.metrics_dir, project):
+        if args.streaming:
+            from streaming import SPILL_ROWS, stream_document_lists
+
+            stream_document_lists(
+                documents_dirs,
+                revisions_csv,
+                output_dir,
+                packages,
+                max_rows=max(1, args.spill_rows or SPILL_ROWS),
+                parts=args.parts,
+                precedence=args.precedence,
+            )
+            return
 
-    files = get_documents(documents_dir)
-    revisions = load_revision_data(revisions_csv)
-
-    package_files = {pkg: [] for pkg in PACKAGES}
-
-    # Route files into packages (NOW supports numeric + alphanumeric codes)
-    for file in files:
-        code = get_drawing_code(file.name)
-        for pkg in code_packages(code):
-            if pkg in package_files:
-                package_files[pkg].append(file)
-
-    # Generate outputs per package
-    for pkg, pkg_files in package_files.items():
-        files_by_tank = {}
-        for file in pkg_files:
-            tank = get_tank_number(file.name)
-            files_by_tank.setdefault(tank, []).append(file)
-
-        sections = []
-
-        general_files = sorted(files_by_tank.pop("General", []), key=sort_key)
-        if general_files:
-            sections.append(("General (Tank 00)", general_files))
-
-        def tank_sort_key(tank_code: str):
-            if tank_code.isdigit():
-                return (0, int(tank_code))
-            return (1, tank_code)
-
-        for tank in sorted(files_by_tank.keys(), key=tank_sort_key):
-            tank_files = sorted(files_by_tank[tank], key=sort_key)
-            if not tank_files:
-                continue
-            if tank.isdigit():
-                label = f"Tank {tank}"
-            else:
-                label = f"Tank {tank}"
-            sections.append((label, tank_files))
-
-        out = output_dir / f"document_list_{pkg}.tex"
-        title = PACKAGES[pkg]["title"]
-
-        write_latex_list(sections, out, revisions, title)
-        total = sum(len(group_files) for _, group_files in sections)
-        print(f"Wrote {total} documents to {out}")
+        register = scan_register(documents_dirs, args.precedence)
+        revisions = load_revision_data(revisions_csv)
+        write_document_lists(register, revisions, output_dir, packages, args.parts)
 
 
 if __name__ == "__main__":
@@ -1,22 +1,83 @@
 import argparse
+import os
 from pathlib import Path
 import csv
 
+import metrics
+from coordination import FolderLocks
+from discovery import (
+    DEFAULT_PRECEDENCE,
+    PRECEDENCE,
+    as_roots,
+    discover,
+    drawing_id,
+    resolve_roots,
+)
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
-EXTENSIONS = {".pdf", ".rvt", ".tex"}
 DELIMITER = ";"  # Excel-friendly (EU locales)
 
+FIELDNAMES = ["drawing_id", "rev", "issue_date", "status", "exists"]
+# Written only once --fingerprint has been used on the register
+FINGERPRINT_FIELDS = ["content_hash", "hash_rev", "content_changed"]
+
+
+def get_drawing_ids(documents_dirs):
+    """Drawing ids of the documents in one folder or several."""
+    return {drawing_id(name) for _, name in discover(as_roots(documents_dirs))}
+
+
+def get_documents_by_id(documents_dirs, precedence: str = DEFAULT_PRECEDENCE) -> dict:
+    """Document files grouped by drawing_id."""
+    roots = as_roots(documents_dirs)
+    documents = {}
+    for root, name in discover(roots, precedence):
+        documents.setdefault(drawing_id(name), []).append(roots[root] / name)
+    return documents
+
+
+def update_fingerprints(
+    csv_rows: dict, documents_dirs, precedence: str = DEFAULT_PRECEDENCE
+) -> list:
+    """
+    Record a content digest per drawing; returns the ids whose content
+    changed without a rev bump.
+    """
+    from fingerprint import DigestCache, combined_digest
+
+    documents = get_documents_by_id(documents_dirs, precedence)
+    cache = DigestCache()
+    digests = cache.digests([f for files in documents.values() for f in files])
+    cache.save()
+    metrics.count("cache_hits", cache.hits, cache="digests")
+    metrics.count("cache_misses", cache.misses, cache="digests")
+    print(
+        f"Fingerprinted {len(digests)} files "
+        f"({cache.hits} cached, {cache.misses} hashed)"
+    )
+
+    flagged = []
+    for drawing_id, files in documents.items():
+        row = csv_rows[drawing_id]
+        digest = combined_digest([digests[f] for f in files])
+        rev = row.get("rev", "")
+        stored = row.get("content_hash", "")
+
+        if stored and digest != stored and rev == row.get("hash_rev", ""):
+            row["content_changed"] = "yes"
+        elif rev != row.get("hash_rev", ""):
+            row["content_changed"] = ""
+        else:
+            row.setdefault("content_changed", "")
+
+        if row["content_changed"] == "yes":
+            flagged.append(drawing_id)
 
-def get_drawing_ids(documents_dir: Path):
-    if not documents_dir.exists():
-        return set()
+        row["content_hash"] = digest
+        row["hash_rev"] = rev
 
-    return {
-        f.stem.split("_", 1)[0]
-        for f in documents_dir.iterdir()
-        if f.is_file() and f.suffix.lower() in EXTENSIONS
-    }
+    return flagged
 
 
 def read_csv(csv_file: Path):
@@ -36,69 +97,135 @@ def read_csv(csv_file: Path):
 
 
 def write_csv(csv_file: Path, rows):
-    fieldnames = ["drawing_id", "rev", "issue_date", "status", "exists"]
+    """
+    Write the register to a temp file next to `csv_file` and rename it into
+    place, so Excel and concurrent builds never see a half-written CSV.
+    """
+    fieldnames = FIELDNAMES + [
+        field for field in FINGERPRINT_FIELDS
+        if any(row.get(field) is not None for row in rows.values())
+    ]
 
     csv_file.parent.mkdir(parents=True, exist_ok=True)
-    with csv_file.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=fieldnames,
-            delimiter=DELIMITER
-        )
-        writer.writeheader()
-        for row in rows.values():
-            writer.writerow(row)
-
-
-def parse_args():
+    temp = csv_file.with_name(f".{csv_file.name}.{os.getpid()}.tmp")
+    try:
+        with temp.open("w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(
+                f,
+                fieldnames=fieldnames,
+                delimiter=DELIMITER,
+                restval="",
+            )
+            writer.writeheader()
+            for row in rows.values():
+                writer.writerow(row)
+        os.replace(temp, csv_file)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
         description="Generate or update revisions CSV from a documents folder."
     )
     parser.add_argument(
         "--documents-dir",
-        type=Path,
-        default=PROJECT_ROOT / "data" / "documents",
-        help="Folder containing drawing/document files.",
+        action="append",
+        help=(
+            "Folder containing drawing/document files (default: data/documents). "
+            "Repeat it or pass a glob pattern to list several folders concurrently."
+        ),
+    )
+    parser.add_argument(
+        "--precedence",
+        choices=PRECEDENCE,
+        default=DEFAULT_PRECEDENCE,
+        help=(
+            "Copy fingerprinted when a drawing id is found in several document "
+            "folders: the first folder given or the newest file (default: %(default)s)."
+        ),
     )
     parser.add_argument(
         "--csv-file",
         type=Path,
-        help="Output revisions CSV path. Defaults to <documents-dir>/revisions.csv.",
+        help="Output revisions CSV path. Defaults to revisions.csv in the first --documents-dir.",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help=(
+            "Record content digests and flag documents whose content changed "
+            "without a rev bump."
+        ),
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        type=Path,
+        help="Write an OpenMetrics textfile and a JSON run record to this folder.",
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def main():
-    args = parse_args()
-    documents_dir = args.documents_dir.expanduser().resolve()
+def main(argv=None):
+    args = parse_args(argv)
+    documents_dirs = resolve_roots(args.documents_dir or [PROJECT_ROOT / "data" / "documents"])
+    if not documents_dirs:
+        raise SystemExit("No document folder found.")
     csv_file = (
         args.csv_file.expanduser().resolve()
         if args.csv_file is not None
-        else (documents_dir / "revisions.csv")
+        else (documents_dirs[0] / "revisions.csv")
     )
 
-    file_ids = get_drawing_ids(documents_dir)
-    csv_rows = read_csv(csv_file)
-
-    # Mark all as not existing initially
-    for row in csv_rows.values():
-        row["exists"] = "no"
-
-    # Add or update rows based on folder contents
-    for drawing_id in file_ids:
-        if drawing_id in csv_rows:
-            csv_rows[drawing_id]["exists"] = "yes"
-        else:
-            csv_rows[drawing_id] = {
-                "drawing_id": drawing_id,
-                "rev": "",
-                "issue_date": "",
-                "status": "",
-                "exists": "yes",
-            }
-
-    write_csv(csv_file, csv_rows)
-    print(f"Revision register updated safely: {csv_file}")
+    project = metrics.project_name(documents_dirs[0])
+    with metrics.recording("generate_revision_csv", args.metrics_dir, project):
+        # Read-modify-write under the folder lock so a concurrent sync or build
+        # cannot interleave with this update.
+        locks = FolderLocks(
+            folder if folder.exists() else csv_file.parent for folder in documents_dirs
+        )
+        locks.acquire(on_wait=lambda holder: print(
+            f"Waiting for pid {holder.get('pid', '?')} to release the document folders..."
+        ))
+        try:
+            with metrics.timer("scan"):
+                file_ids = get_drawing_ids(documents_dirs)
+                csv_rows = read_csv(csv_file)
+            metrics.gauge("register_documents", len(file_ids))
+
+            # Mark all as not existing initially
+            for row in csv_rows.values():
+                row["exists"] = "no"
+
+            # Add or update rows based on folder contents
+            added = 0
+            for drawing_id in file_ids:
+                if drawing_id in csv_rows:
+                    csv_rows[drawing_id]["exists"] = "yes"
+                else:
+                    added += 1
+                    csv_rows[drawing_id] = {
+                        "drawing_id": drawing_id,
+                        "rev": "",
+                        "issue_date": "",
+                        "status": "",
+                        "exists": "yes",
+                    }
+            metrics.count("drawings_added", added)
+
+            if args.fingerprint:
+                with metrics.timer("fingerprint"):
+                    flagged = update_fingerprints(csv_rows, documents_dirs, args.precedence)
+                for drawing_id in sorted(flagged):
+                    print(f"Warning: {drawing_id} content changed without a rev bump")
+
+            with metrics.timer("write"):
+                write_csv(csv_file, csv_rows)
+            metrics.count("revision_rows", len(csv_rows))
+        finally:
+            locks.release()
+        print(f"Revision register updated safely: {csv_file}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,494 @@
+import argparse
+import mmap
+import re
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from array import array
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import PurePosixPath, Path
+from xml.parsers import expat
+
+from coordination import FolderLock
+from generate_revision_csv import get_drawing_ids, read_csv, write_csv
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Register fields an import can fill; drawing_id is required
+IMPORT_FIELDS = ("drawing_id", "rev", "issue_date", "status")
+
+# Workbook header per field unless --column says otherwise (matched
+# case-insensitively)
+DEFAULT_COLUMNS = {field: field for field in IMPORT_FIELDS}
+
+# Excel stores dates as day serials; written to the CSV in this format
+DEFAULT_DATE_FORMAT = "%Y-%m-%d"
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Compressed XML is inflated and parsed this many bytes at a time
+READ_CHUNK = 1 << 16
+
+CELL_REF_RE = re.compile(r"([A-Z]+)")
+COLUMN_LETTERS_RE = re.compile(r"[A-Za-z]{1,3}")
+
+
+# ---------------------------------------------------------------------------
+# Workbook
+# ---------------------------------------------------------------------------
+
+def column_index(letters: str) -> int:
+    """'A' -> 0, 'Z' -> 25, 'AA' -> 26."""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def find_sheet(archive: zipfile.ZipFile, sheet=None) -> tuple:
+    """
+    (member name, 1904 date system) of a worksheet, by name or the first
+    one. workbook.xml and its relationships are small and read whole.
+    """
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    properties = workbook.find(f"{MAIN_NS}workbookPr")
+    date1904 = properties is not None and properties.get("date1904") in ("1", "true")
+
+    sheets = workbook.findall(f"{MAIN_NS}sheets/{MAIN_NS}sheet")
+    if not sheets:
+        raise ValueError("Workbook has no worksheets")
+    if sheet is None:
+        chosen = sheets[0]
+    else:
+        matches = [s for s in sheets if s.get("name") == sheet]
+        if not matches:
+            names = ", ".join(s.get("name", "?") for s in sheets)
+            raise ValueError(f"No worksheet named '{sheet}'. Available: {names}")
+        chosen = matches[0]
+
+    relations = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {
+        rel.get("Id"): rel.get("Target")
+        for rel in relations.findall(f"{PACKAGE_REL_NS}Relationship")
+    }
+    target = targets[chosen.get(f"{REL_NS}id")]
+    if target.startswith("/"):
+        member = target.lstrip("/")
+    else:
+        member = str(PurePosixPath("xl") / target)
+    return member, date1904
+
+
+class SharedStrings:
+    """
+    The workbook's shared string table, spilled to a temporary file so only
+    an 8-byte offset per string stays in memory. Strings are decoded back
+    on lookup.
+    """
+
+    def __init__(self):
+        self.offsets = array("Q", [0])
+        self.file = tempfile.TemporaryFile()
+        self.view = None
+
+    def append(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def seal(self) -> None:
+        """Finish writing; strings can be looked up from here on."""
+        self.file.flush()
+        if self.offsets[-1]:
+            self.view = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.view[start:end].decode("utf-8") if end > start else ""
+
+    def close(self) -> None:
+        if self.view is not None:
+            self.view.close()
+        self.file.close()
+
+
+@lru_cache(maxsize=None)
+def _local(name: str) -> str:
+    """Element name without its namespace ("uri}row" -> "row")."""
+    return name.rpartition("}")[2]
+
+
+def _parse_chunks(f, parser, done: list):
+    """
+    Feed `f` to an expat parser a chunk at a time and yield what its
+    handlers appended to `done`, so nothing but the current chunk and the
+    item being built is held in memory.
+    """
+    while True:
+        chunk = f.read(READ_CHUNK)
+        parser.Parse(chunk, not chunk)
+        yield from done
+        done.clear()
+        if not chunk:
+            return
+
+
+class _StringHandler:
+    """expat callbacks collecting <si> entries: plain or rich text, no phonetics."""
+
+    def __init__(self, done: list):
+        self.done = done
+        self.parts = None
+        self.collecting = False
+        self.phonetic = False
+
+    def start(self, name, attrs):
+        local = _local(name)
+        if local == "si":
+            self.parts = []
+        elif local == "rPh":
+            self.phonetic = True
+        elif local == "t" and self.parts is not None and not self.phonetic:
+            self.collecting = True
+
+    def end(self, name):
+        local = _local(name)
+        if local == "t":
+            self.collecting = False
+        elif local == "rPh":
+            self.phonetic = False
+        elif local == "si":
+            self.done.append("".join(self.parts))
+            self.parts = None
+
+    def text(self, data):
+        if self.collecting:
+            self.parts.append(data)
+
+
+class _RowHandler(_StringHandler):
+    """
+    expat callbacks turning <row> elements into (row number, {column
+    index: (value, is number)}).
+    """
+
+    def __init__(self, done: list, strings: SharedStrings):
+        super().__init__(done)
+        self.strings = strings
+        self.number = 0
+        self.cells = None
+        self.position = 0
+        self.kind = "n"
+
+    def start(self, name, attrs):
+        local = _local(name)
+        if local == "row":
+            self.number = int(attrs.get("r") or self.number + 1)
+            self.cells = {}
+            self.position = 0
+        elif local == "c":
+            reference = attrs.get("r")
+            if reference:
+                self.position = column_index(CELL_REF_RE.match(reference).group(1))
+            self.kind = attrs.get("t", "n")
+        elif local == "v":
+            self.parts = []
+            self.collecting = True
+        elif local == "is":
+            self.parts = []
+        else:
+            super().start(name, attrs)
+
+    def end(self, name):
+        local = _local(name)
+        if local == "v":
+            self.collecting = False
+        elif local == "c":
+            raw = "".join(self.parts) if self.parts is not None else ""
+            if self.kind == "s" and raw:
+                self.cells[self.position] = (self.strings[int(raw)], False)
+            elif self.kind == "n" and raw:
+                self.cells[self.position] = (raw, True)
+            elif raw:
+                self.cells[self.position] = (raw, False)
+            self.parts = None
+            self.position += 1
+        elif local == "row":
+            self.done.append((self.number, self.cells))
+        else:
+            super().end(name)
+
+
+def _parser(handler):
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.text
+    return parser
+
+
+def shared_strings(archive: zipfile.ZipFile) -> SharedStrings:
+    """Read the shared string table incrementally into a SharedStrings."""
+    strings = SharedStrings()
+    if "xl/sharedStrings.xml" in archive.namelist():
+        done = []
+        with archive.open("xl/sharedStrings.xml") as f:
+            for text in _parse_chunks(f, _parser(_StringHandler(done)), done):
+                strings.append(text)
+    strings.seal()
+    return strings
+
+
+def iter_sheet_rows(archive: zipfile.ZipFile, member: str, strings: SharedStrings):
+    """
+    Yield (row number, {column index: (value, is number)}) per worksheet
+    row, streaming the sheet XML; no row is kept once yielded. Empty rows
+    are not stored in the sheet and are not yielded.
+    """
+    done = []
+    with archive.open(member) as f:
+        yield from _parse_chunks(f, _parser(_RowHandler(done, strings)), done)
+
+
+def format_number(raw: str) -> str:
+    """'3' / '3.0' -> '3'; other numbers as Excel stored them."""
+    number = float(raw)
+    return str(int(number)) if number.is_integer() else raw
+
+
+@lru_cache(maxsize=4096)
+def format_date(raw: str, date1904: bool, date_format: str) -> str:
+    """An Excel day serial as a date string."""
+    epoch = datetime(1904, 1, 1) if date1904 else datetime(1899, 12, 30)
+    return (epoch + timedelta(days=float(raw))).strftime(date_format)
+
+
+# ---------------------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------------------
+
+def resolve_columns(header: dict, columns: dict) -> dict:
+    """
+    Map fields to column indexes: a workbook header (case-insensitive)
+    first, otherwise a column letter such as "C".
+    """
+    by_header = {
+        str(value).strip().lower(): index for index, (value, _) in header.items()
+    }
+    resolved = {}
+    for field, spec in columns.items():
+        index = by_header.get(spec.strip().lower())
+        if index is None and COLUMN_LETTERS_RE.fullmatch(spec.strip()):
+            index = column_index(spec.strip())
+        if index is None:
+            if field == "drawing_id":
+                raise ValueError(
+                    f"Column '{spec}' for drawing_id not found. "
+                    f"Headers: {', '.join(str(value) for value, _ in header.values())}"
+                )
+            print(f"Warning: column '{spec}' for {field} not found; not imported")
+            continue
+        resolved[field] = index
+    return resolved
+
+
+def read_workbook(
+    workbook: Path,
+    columns: dict,
+    sheet=None,
+    header_row: int = 1,
+    date_format: str = DEFAULT_DATE_FORMAT,
+):
+    """
+    Yield {field: value} per data row of a worksheet. `columns` maps
+    register fields to headers or column letters; rows above
+    `header_row` are skipped and rows without a drawing id are dropped.
+    """
+    with zipfile.ZipFile(workbook) as archive:
+        member, date1904 = find_sheet(archive, sheet)
+        strings = shared_strings(archive)
+        try:
+            resolved = None
+            for number, cells in iter_sheet_rows(archive, member, strings):
+                if number < header_row:
+                    continue
+                if resolved is None:
+                    resolved = resolve_columns(cells, columns)
+                    continue
+
+                record = {}
+                for field, index in resolved.items():
+                    value, is_number = cells.get(index, ("", False))
+                    if is_number:
+                        if field == "issue_date":
+                            value = format_date(value, date1904, date_format)
+                        else:
+                            value = format_number(value)
+                    record[field] = value.strip()
+                if record.get("drawing_id"):
+                    yield record
+        finally:
+            strings.close()
+
+
+def merge_records(csv_rows: dict, records, file_ids: set) -> dict:
+    """
+    Merge imported records into the register rows in place. Blank cells
+    never clear a value; the last workbook row for a drawing wins.
+    Returns counts of added, updated and unchanged drawings.
+    """
+    counts = {"rows": 0, "added": 0, "updated": 0, "unchanged": 0}
+    outcomes = {}
+    for record in records:
+        counts["rows"] += 1
+        drawing_id = record["drawing_id"].split("_", 1)[0]
+        row = csv_rows.get(drawing_id)
+        if row is None:
+            row = csv_rows[drawing_id] = {
+                "drawing_id": drawing_id,
+                "rev": "",
+                "issue_date": "",
+                "status": "",
+                "exists": "yes" if drawing_id in file_ids else "no",
+            }
+            outcomes[drawing_id] = "added"
+
+        changed = False
+        for field, value in record.items():
+            if field != "drawing_id" and value and row.get(field) != value:
+                row[field] = value
+                changed = True
+        if outcomes.get(drawing_id) != "added":
+            if changed:
+                outcomes[drawing_id] = "updated"
+            else:
+                outcomes.setdefault(drawing_id, "unchanged")
+
+    for outcome in outcomes.values():
+        counts[outcome] += 1
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def parse_column(value: str) -> tuple:
+    field, sep, spec = value.partition("=")
+    field = field.strip()
+    if not sep or field not in IMPORT_FIELDS or not spec.strip():
+        raise argparse.ArgumentTypeError(
+            f"expected FIELD=HEADER with FIELD one of {', '.join(IMPORT_FIELDS)}"
+        )
+    return field, spec
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Merge a client revision register (.xlsx) into the revisions CSV."
+    )
+    parser.add_argument("workbook", type=Path, help="Excel workbook (.xlsx).")
+    parser.add_argument(
+        "--documents-dir",
+        type=Path,
+        default=PROJECT_ROOT / "data" / "documents",
+        help="Folder containing drawing/document files.",
+    )
+    parser.add_argument(
+        "--csv-file",
+        type=Path,
+        help="Revisions CSV to update. Defaults to <documents-dir>/revisions.csv.",
+    )
+    parser.add_argument(
+        "--sheet",
+        help="Worksheet name. Defaults to the first sheet.",
+    )
+    parser.add_argument(
+        "--header-row",
+        type=int,
+        default=1,
+        help="Row holding the column headers (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--column",
+        type=parse_column,
+        action="append",
+        default=[],
+        metavar="FIELD=HEADER",
+        help=(
+            "Workbook header (or column letter) for a register field, e.g. "
+            "drawing_id=\"Document no.\" or rev=D. Repeatable; unmapped fields "
+            "use a header named like the field."
+        ),
+    )
+    parser.add_argument(
+        "--date-format",
+        default=DEFAULT_DATE_FORMAT,
+        help="strftime format for issue dates stored as Excel dates (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would change without writing the CSV.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workbook = args.workbook.expanduser().resolve()
+    documents_dir = args.documents_dir.expanduser().resolve()
+    csv_file = (
+        args.csv_file.expanduser().resolve()
+        if args.csv_file is not None
+        else (documents_dir / "revisions.csv")
+    )
+    columns = {**DEFAULT_COLUMNS, **dict(args.column)}
+
+    start = time.perf_counter()
+    # Same lock as generate_revision_csv.py and build.py
+    lock = FolderLock(documents_dir if documents_dir.exists() else csv_file.parent)
+    lock.acquire(on_wait=lambda holder: print(
+        f"Waiting for pid {holder.get('pid', '?')} to release {lock.folder}..."
+    ))
+    try:
+        csv_rows = read_csv(csv_file)
+        records = read_workbook(
+            workbook,
+            columns,
+            sheet=args.sheet,
+            header_row=max(1, args.header_row),
+            date_format=args.date_format,
+        )
+        counts = merge_records(csv_rows, records, get_drawing_ids(documents_dir))
+        if not args.dry_run:
+            write_csv(csv_file, csv_rows)
+    finally:
+        lock.release()
+
+    print(
+        f"Read {counts['rows']} rows from {workbook.name} in "
+        f"{time.perf_counter() - start:.2f}s: {counts['added']} added, "
+        f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+    )
+    if args.dry_run:
+        print("Dry run; revisions CSV not written")
+    else:
+        print(f"Revision register updated safely: {csv_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import compileall
+import py_compile
+import shutil
+import tempfile
+import zipapp
+from pathlib import Path
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+SRC_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SRC_DIR.parent
+
+# The app takes the folder it sits in as project root (templates, data,
+# latex_build/), so it is written to the repository root by default.
+DEFAULT_OUTPUT = PROJECT_ROOT / "doclist.pyz"
+DEFAULT_INTERPRETER = "/usr/bin/env python3"
+
+# Build tooling that is not part of the app
+EXCLUDED = {Path(__file__).name}
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def stage_sources(stage_dir: Path) -> list:
+    """Copy the app modules into `stage_dir`; returns their names."""
+    names = []
+    for source in sorted(SRC_DIR.glob("*.py")):
+        if source.name in EXCLUDED:
+            continue
+        shutil.copy2(source, stage_dir / source.name)
+        names.append(source.name)
+    return names
+
+
+def compile_bytecode(stage_dir: Path, archive: Path) -> None:
+    """
+    Precompile every module to unchecked hash-based module.pyc for
+    zipimport; other Python versions fall back to the source.
+    """
+    if not compileall.compile_dir(
+        stage_dir,
+        quiet=1,
+        ddir=str(archive),
+        legacy=True,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    ):
+        raise SystemExit("Compiling the app modules failed.")
+
+
+def build_zipapp(output: Path, interpreter: str, compressed: bool = False) -> int:
+    """Write the app to `output`; returns the number of modules packed."""
+    with tempfile.TemporaryDirectory(prefix="doclist-zipapp-") as scratch:
+        stage_dir = Path(scratch)
+        names = stage_sources(stage_dir)
+        compile_bytecode(stage_dir, output)
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        temp = output.with_name(f".{output.name}.tmp")
+        zipapp.create_archive(
+            stage_dir, temp, interpreter=interpreter, compressed=compressed
+        )
+        temp.replace(output)
+    return len(names)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Package the command-line tool as a single-file zipapp with "
+            "precompiled bytecode."
+        )
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_OUTPUT,
+        help="Zipapp to write (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--python",
+        default=DEFAULT_INTERPRETER,
+        help="Interpreter for the shebang line (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Deflate the archive (smaller file, slightly slower start).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output.expanduser().resolve()
+    count = build_zipapp(output, args.python, args.compress)
+    print(f"Wrote {output} ({count} modules, {output.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
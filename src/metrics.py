@@ -0,0 +1,238 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PREFIX = "doclist"
+
+RUNS_FILE = "runs.jsonl"
+
+COUNTERS = {
+    "files_scanned": "Document files listed from a documents folder.",
+    "parse_rejects": "Listed files without a valid drawing code.",
+    "rows_written": "Rows written to document lists.",
+    "revision_rows": "Rows written to the revisions CSV.",
+    "drawings_added": "Drawings added to the revisions CSV.",
+    "cache_hits": "Lookups answered from a cache.",
+    "cache_misses": "Lookups a cache could not answer.",
+    "tex_passes": "TeX engine passes run.",
+    "pages_written": "Pages in compiled reports.",
+    "bytes_published": "Bytes written to the result folder.",
+}
+
+GAUGES = {
+    "register_documents": "Documents in the register.",
+    "run_timestamp_seconds": "Start of the run (Unix time).",
+    "run_duration_seconds": "Wall time of the run.",
+    "run_success": "1 if the run finished without an error.",
+}
+
+SUMMARIES = {
+    "stage_seconds": "Time spent in each stage.",
+}
+
+
+# ---------------------------------------------------------------------------
+# Collection
+# ---------------------------------------------------------------------------
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Metrics:
+    """Counters, gauges and stage timings of one run, keyed by name and labels."""
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}       # key -> [count, seconds]
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels) -> None:
+        self.gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        timing = self.timings.setdefault(_key(name, labels), [0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        """Time a block as stage_seconds{stage=...}."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def to_record(self) -> dict:
+        def entries(table, value):
+            return [
+                {"name": name, "labels": dict(labels), **value(entry)}
+                for (name, labels), entry in sorted(table.items())
+            ]
+        return {
+            "counters": entries(self.counters, lambda value: {"value": value}),
+            "gauges": entries(self.gauges, lambda value: {"value": value}),
+            "timings": entries(
+                self.timings, lambda entry: {"count": entry[0], "seconds": entry[1]}
+            ),
+        }
+
+
+_current = Metrics()
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    _current.count(name, value, **labels)
+
+
+def gauge(name: str, value: float, **labels) -> None:
+    _current.gauge(name, value, **labels)
+
+
+def timer(stage: str, **labels):
+    return _current.timer(stage, **labels)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple, common: dict) -> str:
+    pairs = list(common.items()) + list(labels)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def openmetrics(metrics: Metrics, common: dict) -> str:
+    """The run in OpenMetrics text format; `common` labels every sample."""
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        if not samples:
+            return
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.extend(samples)
+
+    def samples_of(table, name):
+        return [(labels, entry) for (entry_name, labels), entry in sorted(table.items())
+                if entry_name == name]
+
+    names = {name for name, _ in metrics.counters}
+    for name in sorted(names):
+        family(name, "counter", COUNTERS.get(name, name), [
+            f"{PREFIX}_{name}_total{_labels(labels, common)} {value}"
+            for labels, value in samples_of(metrics.counters, name)
+        ])
+    names = {name for name, _ in metrics.gauges}
+    for name in sorted(names):
+        family(name, "gauge", GAUGES.get(name, name), [
+            f"{PREFIX}_{name}{_labels(labels, common)} {value}"
+            for labels, value in samples_of(metrics.gauges, name)
+        ])
+    names = {name for name, _ in metrics.timings}
+    for name in sorted(names):
+        samples = []
+        for labels, (observations, seconds) in samples_of(metrics.timings, name):
+            samples.append(f"{PREFIX}_{name}_count{_labels(labels, common)} {observations}")
+            samples.append(f"{PREFIX}_{name}_sum{_labels(labels, common)} {seconds:.6f}")
+        family(name, "summary", SUMMARIES.get(name, name), samples)
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def _safe(value: str) -> str:
+    return "".join(char if char.isalnum() or char in "-." else "_" for char in value)
+
+
+def write_run(metrics_dir: Path, metrics: Metrics, script: str, project: str, record: dict) -> Path:
+    """
+    Replace <metrics-dir>/doclist_<script>_<project>.prom (for a textfile
+    collector) and append the run record to runs.jsonl.
+    """
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    textfile = metrics_dir / f"{PREFIX}_{_safe(script)}_{_safe(project)}.prom"
+    temp = textfile.with_name(f".{textfile.name}.{os.getpid()}.tmp")
+    try:
+        temp.write_text(
+            openmetrics(metrics, {"project": project, "script": script}),
+            encoding="utf-8",
+        )
+        os.replace(temp, textfile)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+    import json
+
+    # One write per line, so concurrent runs append whole records
+    line = json.dumps(record, sort_keys=True) + "\n"
+    fd = os.open(metrics_dir / RUNS_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line.encode("utf-8"))
+    finally:
+        os.close(fd)
+    return textfile
+
+
+def project_name(documents_dir: Path) -> str:
+    """Project label: the documents folder, or its parent when it is named 'documents'."""
+    folder = documents_dir.expanduser().resolve()
+    return folder.parent.name if folder.name.lower() == "documents" else folder.name
+
+
+@contextmanager
+def recording(script: str, metrics_dir: Optional[Path], project: str):
+    """
+    Record a script run. With `metrics_dir` the textfile and run record are
+    written when it ends, whether it succeeds or fails.
+    """
+    started = time.time()
+    start = time.perf_counter()
+    if metrics_dir is None:
+        # Nothing is written; skip the imports a record needs
+        yield _current
+        return
+
+    import socket
+
+    success = False
+    try:
+        yield _current
+        success = True
+    finally:
+        duration = time.perf_counter() - start
+        _current.gauge("run_timestamp_seconds", round(started, 3))
+        _current.gauge("run_duration_seconds", round(duration, 3))
+        _current.gauge("run_success", int(success))
+        record = {
+            "script": script,
+            "project": project,
+            "host": socket.gethostname(),
+            "argv": sys.argv[1:],
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(started)),
+            "duration_seconds": round(duration, 3),
+            "success": success,
+            **_current.to_record(),
+        }
+        textfile = write_run(metrics_dir, _current, script, project, record)
+        print(f"Wrote metrics to {textfile}")
@@ -0,0 +1,312 @@
+import argparse
+import bisect
+import hashlib
+import json
+import pickle
+from pathlib import Path
+
+from config import CACHE_DIR, PACKAGES
+from generate_doc_list import load_register, load_revision_data, parse_packages
+from register import PACKAGE_BITS, routing_digest
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DOCUMENTS_DIR = PROJECT_ROOT / "data" / "documents"
+DEFAULT_REVISIONS_CSV = PROJECT_ROOT / "data" / "revisions.csv"
+
+INDEX_VERSION = 1
+INDEX_DIR = CACHE_DIR / "indexes"
+
+FIELDS = ("drawing_id", "tank", "code", "packages", "rev", "issue_date", "status", "filename")
+
+# Status filter value matching documents without a status (not yet issued)
+BLANK = "-"
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+def _stat_key(path: Path) -> tuple:
+    try:
+        stat = path.stat()
+    except OSError:
+        return (0, 0)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def index_key(documents_dir: Path, revisions_csv: Path, categories=None) -> tuple:
+    """
+    Freshness key: folder mtime (only names matter), revisions, categories,
+    packages and routing code.
+    """
+    return (
+        INDEX_VERSION,
+        tuple(PACKAGES),
+        routing_digest(),
+        _stat_key(documents_dir),
+        _stat_key(revisions_csv),
+        str(categories) if categories else None,
+        _stat_key(categories) if categories else None,
+    )
+
+
+def build_index(documents_dir: Path, revisions_csv: Path) -> dict:
+    """
+    Parse the register into records (in drawing list order) plus
+    code/tank/status/package -> row id indexes.
+    """
+    register = load_register(documents_dir)
+    revisions = load_revision_data(revisions_csv)
+
+    records = []
+    by_code, by_tank, by_status, by_package = {}, {}, {}, {}
+
+    for row in register.sorted_rows(range(len(register))):
+        name = register.names[row]
+        drawing_id = Path(name).stem.split("_", 1)[0]
+        revision = revisions.get(drawing_id, {})
+        tank = register.tanks[register.tank_id[row]]
+        code = register.codes[register.code_id[row]]
+        status = (revision.get("status") or "").strip()
+        mask = register.packages[row]
+
+        row_id = len(records)
+        records.append((
+            drawing_id,
+            "00" if tank == "General" else tank,
+            code,
+            mask,
+            revision.get("rev") or "",
+            revision.get("issue_date") or "",
+            status,
+            name,
+        ))
+
+        by_code.setdefault(code, []).append(row_id)
+        by_tank.setdefault(records[-1][1], []).append(row_id)
+        by_status.setdefault(status.casefold(), []).append(row_id)
+        for pkg, bit in PACKAGE_BITS.items():
+            if mask & bit:
+                by_package.setdefault(pkg, []).append(row_id)
+
+    return {
+        "records": records,
+        "codes": sorted(by_code),
+        "by_code": by_code,
+        "by_tank": by_tank,
+        "by_status": by_status,
+        "by_package": by_package,
+    }
+
+
+def load_index(
+    documents_dir: Path,
+    revisions_csv: Path,
+    categories=None,
+    rebuild: bool = False,
+) -> dict:
+    """Return the persisted index for a folder, rebuilding it when stale."""
+    digest = hashlib.sha256(str(documents_dir).encode("utf-8")).hexdigest()[:16]
+    index_file = INDEX_DIR / f"{digest}.pickle"
+    key = index_key(documents_dir, revisions_csv, categories)
+
+    if not rebuild:
+        try:
+            with index_file.open("rb") as f:
+                stored = pickle.load(f)
+            if stored.get("key") == key:
+                return stored
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+
+    index = build_index(documents_dir, revisions_csv)
+    index["key"] = key
+
+    try:
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        temp = index_file.with_suffix(".tmp")
+        with temp.open("wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        temp.replace(index_file)
+    except OSError:
+        pass  # the index is a cache; queries still work without it
+
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+def _code_rows(index: dict, low=None, high=None, prefix=None) -> set:
+    codes = index["codes"]
+    start = bisect.bisect_left(codes, low) if low else 0
+    end = bisect.bisect_right(codes, high) if high else len(codes)
+
+    rows = set()
+    for code in codes[start:end]:
+        if prefix is None or code.startswith(prefix):
+            rows.update(index["by_code"][code])
+    return rows
+
+
+def run_query(index: dict, args) -> list:
+    """
+    Intersect the index buckets selected by the filters and return matching
+    records in drawing list order.
+    """
+    candidates = []
+
+    if args.code_from or args.code_to or args.category:
+        candidates.append(_code_rows(
+            index,
+            low=args.code_from.upper() if args.code_from else None,
+            high=args.code_to.upper() if args.code_to else None,
+            prefix=args.category.upper() if args.category else None,
+        ))
+    if args.tank:
+        rows = set()
+        for tank in args.tank:
+            rows.update(index["by_tank"].get(tank.zfill(2), []))
+        candidates.append(rows)
+    if args.status is not None:
+        status = "" if args.status == BLANK else args.status.strip().casefold()
+        candidates.append(set(index["by_status"].get(status, [])))
+    if args.packages:
+        rows = set()
+        for pkg in parse_packages(args.packages):
+            rows.update(index["by_package"].get(pkg, []))
+        candidates.append(rows)
+
+    if candidates:
+        candidates.sort(key=len)
+        selected = candidates[0].intersection(*candidates[1:])
+        rows = sorted(selected)
+    else:
+        rows = range(len(index["records"]))
+
+    records = [index["records"][row] for row in rows]
+    if args.rev is not None:
+        rev = "" if args.rev == BLANK else args.rev
+        records = [record for record in records if record[4] == rev]
+    return records
+
+
+def record_dict(record: tuple) -> dict:
+    values = dict(zip(FIELDS, record))
+    values["packages"] = [pkg for pkg, bit in PACKAGE_BITS.items() if record[3] & bit]
+    return values
+
+
+def print_table(records) -> None:
+    rows = [
+        [
+            str(value) if not isinstance(value, list) else ",".join(value)
+            for value in record_dict(record).values()
+        ]
+        for record in records
+    ]
+    widths = [
+        max([len(field)] + [len(row[i]) for row in rows])
+        for i, field in enumerate(FIELDS)
+    ]
+    print("  ".join(field.ljust(width) for field, width in zip(FIELDS, widths)).rstrip())
+    for row in rows:
+        print("  ".join((value or "-").ljust(width) for value, width in zip(row, widths)).rstrip())
+    print(f"{len(rows)} document(s)")
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Query the parsed document register and revision data."
+    )
+    parser.add_argument(
+        "--documents-dir",
+        type=Path,
+        default=DEFAULT_DOCUMENTS_DIR,
+        help="Folder containing drawing/document files.",
+    )
+    parser.add_argument(
+        "--revisions-csv",
+        type=Path,
+        help=(
+            "Revisions CSV path. Defaults to <documents-dir>/revisions.csv for "
+            "an external documents folder, as in build.py."
+        ),
+    )
+    parser.add_argument(
+        "--categories",
+        type=Path,
+        help="Optional project category registry (.json or .toml).",
+    )
+    parser.add_argument(
+        "--tank",
+        action="append",
+        help="Tank number (00 = General). Repeat for several tanks.",
+    )
+    parser.add_argument(
+        "--category",
+        help="Code prefix, e.g. 13 (reinforcement layouts) or C (calculations).",
+    )
+    parser.add_argument("--code-from", help="Lowest code to include, e.g. 1300.")
+    parser.add_argument("--code-to", help="Highest code to include, e.g. 1499.")
+    parser.add_argument(
+        "--packages",
+        help=f"Comma-separated packages ({', '.join(PACKAGES)}).",
+    )
+    parser.add_argument(
+        "--status",
+        help=f"Revision status (case-insensitive); '{BLANK}' matches documents without one.",
+    )
+    parser.add_argument(
+        "--rev",
+        help=f"Revision; '{BLANK}' matches documents without one.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help="Ignore the persisted index and rebuild it.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    categories = None
+    if args.categories is not None:
+        from category_registry import use_registry
+
+        categories = args.categories.expanduser().resolve()
+        use_registry(categories)
+    documents_dir = args.documents_dir.expanduser().resolve()
+    if args.revisions_csv is not None:
+        revisions_csv = args.revisions_csv.expanduser().resolve()
+    elif documents_dir != DEFAULT_DOCUMENTS_DIR:
+        # Same default as build.py for an external documents folder
+        revisions_csv = documents_dir / "revisions.csv"
+    else:
+        revisions_csv = DEFAULT_REVISIONS_CSV
+
+    index = load_index(
+        documents_dir, revisions_csv, categories, rebuild=args.rebuild_index
+    )
+    records = run_query(index, args)
+
+    if args.json:
+        print(json.dumps([record_dict(record) for record in records], indent=2))
+    else:
+        print_table(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import sys
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+
+import config
+import drawing_categories
+import filename_parser
+import rules
+from config import PACKAGES
+from fileops import module_digest
+from filename_parser import (
+    get_drawing_code,
+    get_tank_number,
+    code_packages,
+)
+from rules import active_rules
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+# One bit per package, in config.PACKAGES order
+PACKAGE_BITS = {pkg: 1 << index for index, pkg in enumerate(PACKAGES)}
+
+# Smallest array type holding a mask of every package
+PACKAGE_TYPECODE = next(
+    (code for code in "BHIQ" if len(PACKAGES) <= 8 * array(code).itemsize), None
+)
+if PACKAGE_TYPECODE is None:
+    raise ValueError(
+        f"config.PACKAGES lists {len(PACKAGES)} packages; at most 64 are supported"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+class StringTable:
+    """Interned strings addressed by compact integer ids."""
+
+    def __init__(self):
+        self._ids = {}
+        self.values = []
+
+    def intern(self, value: str) -> int:
+        index = self._ids.get(value)
+        if index is None:
+            index = len(self.values)
+            self._ids[value] = index
+            self.values.append(value)
+        return index
+
+    def find(self, value: str):
+        """Id of `value`, or None when it was never interned."""
+        return self._ids.get(value)
+
+    def ranks(self, key=None) -> array:
+        """Rank of every id when the strings are sorted (by `key`)."""
+        order = sorted(range(len(self.values)), key=lambda i: (
+            key(self.values[i]) if key else self.values[i]
+        ))
+        ranks = array("I", bytes(4 * len(order)))
+        for rank, index in enumerate(order):
+            ranks[index] = rank
+        return ranks
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def lexsort(rows, columns) -> array:
+    """
+    Sort row indices by key columns, most significant first, with one stable
+    C-level sort per column.
+    """
+    rows = list(rows)
+    for column in reversed(columns):
+        rows.sort(key=column.__getitem__)
+    return array("I", rows)
+
+
+class RowPaths(Sequence):
+    """Read-only list of register rows, materialised as Paths on access."""
+
+    def __init__(self, register, rows: array):
+        self._register = register
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return RowPaths(self._register, self._rows[index])
+        return self._register.path(self._rows[index])
+
+
+def package_mask(code: str) -> int:
+    """PACKAGE_BITS of the packages a drawing code is routed to."""
+    mask = 0
+    for pkg in code_packages(code):
+        mask |= PACKAGE_BITS.get(pkg, 0)
+    return mask
+
+
+def routing_digest() -> str:
+    """
+    Digest of the code that parses and routes document names: packages,
+    built-in categories, filename parsing, rules and this register. Caches
+    of routed documents key on it so code edits do not serve stale routing.
+    """
+    return module_digest(
+        config, drawing_categories, filename_parser, rules, sys.modules[__name__]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Register
+# ---------------------------------------------------------------------------
+
+class ColumnarRegister:
+    """
+    Document register stored as compact parallel columns, ordered by the
+    active rules.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.roots = [root]
+        self.rules = active_rules()
+        self.names = []
+        self.tanks = StringTable()
+        self.codes = StringTable()
+
+        self.root_id = array("H")
+        self.tank_id = array("H")
+        self.code_id = array("I")
+        self.section = array("B")
+        self.key1 = array("I")
+        self.key2 = array("I")
+        self.key3 = array("I")
+        self.packages = array(PACKAGE_TYPECODE)
+
+        self._sort_columns = None
+
+    @classmethod
+    def from_names(cls, root: Path, names):
+        register = cls(root)
+        for name in names:
+            register.append(name)
+        return register
+
+    @classmethod
+    def from_documents(cls, roots: list, documents):
+        """Register of (root index, name) pairs found under several roots."""
+        register = cls(roots[0])
+        register.roots = list(roots)
+        for root, name in documents:
+            register.append(name, root)
+        return register
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, name: str, root: int = 0) -> None:
+        code = get_drawing_code(name)
+        code_id = self.codes.intern(code)
+
+        mask = package_mask(code)
+
+        section, key1, key2, key3 = self.rules.code_keys(code)
+        if self.rules.orders_by_code(section):
+            # Replaced by the code's rank once all codes are known
+            key1 = code_id
+
+        self.names.append(name)
+        self.root_id.append(root)
+        self.tank_id.append(self.tanks.intern(get_tank_number(name)))
+        self.code_id.append(code_id)
+        self.section.append(section)
+        self.key1.append(key1)
+        self.key2.append(key2)
+        self.key3.append(key3)
+        self.packages.append(mask)
+        self._sort_columns = None
+
+    # -- queries ------------------------------------------------------------
+
+    def count_code(self, code: str) -> int:
+        """Rows whose drawing code is `code` (e.g. 'N/A' for unparsed names)."""
+        code_id = self.codes.find(code)
+        return 0 if code_id is None else self.code_id.count(code_id)
+
+    def package_rows(self, pkg: str) -> array:
+        """Row indices routed to `pkg`."""
+        bit = PACKAGE_BITS[pkg]
+        return array("I", (
+            row for row, mask in enumerate(self.packages) if mask & bit
+        ))
+
+    def sort_columns(self) -> list:
+        """
+        Key columns, most significant first: tank, sort section, three
+        section-specific keys, filename rank. Built once per register.
+        """
+        if self._sort_columns is None:
+            code_rank = self.codes.ranks()
+            tank_rank = self.tanks.ranks(key=self.rules.tank_key)
+
+            name_rank = array("I", bytes(4 * len(self)))
+            for rank, row in enumerate(
+                sorted(range(len(self)), key=self.names.__getitem__)
+            ):
+                name_rank[row] = rank
+
+            by_code = {
+                section for section in set(self.section)
+                if self.rules.orders_by_code(section)
+            }
+            key1 = array("I", (
+                code_rank[key] if section in by_code else key
+                for key, section in zip(self.key1, self.section)
+            ))
+            tank = array("I", (tank_rank[t] for t in self.tank_id))
+
+            self._sort_columns = [
+                tank, self.section, key1, self.key2, self.key3, name_rank,
+            ]
+        return self._sort_columns
+
+    def sorted_rows(self, rows) -> array:
+        """Rows ordered by tank, then by the drawing list sort order."""
+        return lexsort(rows, self.sort_columns())
+
+    def path(self, row: int) -> Path:
+        return self.roots[self.root_id[row]] / self.names[row]
+
+    def sections(self, pkg: str) -> list:
+        """
+        (label, files) sections for one package: General (Tank 00) first,
+        then each tank in numeric order (per the rules' groups). Files are
+        lazy `RowPaths` views.
+        """
+        rows = self.sorted_rows(self.package_rows(pkg))
+
+        sections = []
+        start = 0
+        for end in range(1, len(rows) + 1):
+            if end < len(rows) and (
+                self.tank_id[rows[end]] == self.tank_id[rows[start]]
+            ):
+                continue
+            tank = self.tanks[self.tank_id[rows[start]]]
+            sections.append((self.rules.tank_label(tank), RowPaths(self, rows[start:end])))
+            start = end
+
+        return sections
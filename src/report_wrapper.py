@@ -0,0 +1,126 @@
+import os
+from pathlib import Path
+from string import Template
+from typing import Optional
+
+from config import PACKAGES, PROJECT_ROOT
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+# pdflatex runs here: project_meta.tex lives in this folder and relative
+# \input paths in the preamble are resolved against it.
+TEX_DIR = PROJECT_ROOT / "latex_build" / "test"
+PROJECT_META_FILE = TEX_DIR / "project_meta.tex"
+PREAMBLE_FILE = PROJECT_ROOT / "tex-templates" / "setup" / "report" / "preamble.tex"
+
+REPORT_TEMPLATE = Template(r"""\documentclass[a4paper,10pt]{article}
+
+\input{$preamble}
+\input{project_meta}
+% Packages not included in the preamble
+\usepackage{tabularx}
+
+\renewcommand{\doctitle}{Drawing \& Document Register}
+\renewcommand{\docsubtitle}{$subtitle}
+
+\renewcommand{\docnumber}{$docnumber}
+\renewcommand{\docrevision}{$revision}
+\renewcommand{\docrevisiondate}{$revision_date}
+
+\renewcommand{\docpreparedby}{$prepared_by}
+\renewcommand{\docapprovedby}{$approved_by}
+
+
+\begin{document}
+$heading\input{$document_list}
+
+\end{document}
+""")
+
+# Title block at the top of a report (of its first shard when sharded)
+HEADING_TEMPLATE = Template(r"""\section*{$title}
+\begin{tabularx}{\textwidth}{@{}l X l l@{}}
+Project no.: & \docprojectnumber & Made by: & \docpreparedby \\
+Project name: & \docproject & Rev.date: & \docrevisiondate \\
+Tank type: & \doctanktype & Rev: & \docrevision \\
+\end{tabularx}
+""")
+
+# Joins separately compiled shards into one PDF, keeping their page numbers
+JOIN_TEMPLATE = Template(r"""\documentclass[a4paper,10pt]{article}
+\usepackage{pdfpages}
+
+\begin{document}
+$pages
+\end{document}
+""")
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def tex_path(path: Path) -> str:
+    """
+    Path as written in \\input: relative to TEX_DIR where possible, forward
+    slashes, without the .tex suffix.
+    """
+    try:
+        path = Path(os.path.relpath(path, TEX_DIR))
+    except ValueError:  # different drive on Windows
+        pass
+    return path.with_suffix("").as_posix()
+
+
+def write_report_wrapper(
+    pkg: str,
+    document_list: Path,
+    folder: Path,
+    jobname: Optional[str] = None,
+    title: Optional[str] = None,
+    first_page: Optional[int] = None,
+    heading: bool = True,
+) -> Path:
+    """
+    Write `report_<pkg>.tex` (or `<jobname>.tex`) into folder, pointing at
+    `document_list`; shards continue the page numbering from `first_page`.
+    """
+    meta = PACKAGES[pkg]
+    wrapper = folder / f"{jobname or f'report_{pkg}'}.tex"
+    start = ""
+    if first_page is not None:
+        start = f"\\setcounter{{page}}{{{first_page}}}\n"
+    if heading:
+        start += HEADING_TEMPLATE.substitute(title=title or meta["title"])
+    wrapper.write_text(
+        REPORT_TEMPLATE.substitute(
+            preamble=tex_path(PREAMBLE_FILE),
+            subtitle=meta["subtitle"],
+            docnumber=meta["docnumber"],
+            revision=meta["revision"],
+            revision_date=meta["revision_date"],
+            prepared_by=meta["prepared_by"],
+            approved_by=meta["approved_by"],
+            heading=start,
+            document_list=tex_path(document_list),
+        ),
+        encoding="utf-8",
+    )
+    return wrapper
+
+
+def write_join_wrapper(parts: list, folder: Path, jobname: str) -> Path:
+    """Write `<jobname>.tex` that concatenates the PDFs in `parts`."""
+    wrapper = folder / f"{jobname}.tex"
+    wrapper.write_text(
+        JOIN_TEMPLATE.substitute(
+            pages="\n".join(
+                f"\\includepdf[pages=-]{{{part.as_posix()}}}" for part in parts
+            ),
+        ),
+        encoding="utf-8",
+    )
+    return wrapper
@@ -0,0 +1,99 @@
+import csv
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from config import CSV_DELIMITER, CSV_ENCODING
+from fileops import file_digest
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+# Used when neither SOURCE_DATE_EPOCH nor any revision issue date is set
+# (2000-01-01T00:00:00Z).
+DEFAULT_EPOCH = 946684800
+
+ISSUE_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d.%m.%y", "%d/%m/%Y")
+
+
+# ---------------------------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------------------------
+
+def input_manifest(paths) -> str:
+    """Digest of the names and contents of the build inputs (missing ones by name)."""
+    digest = hashlib.sha256()
+    for path in sorted(paths, key=lambda p: p.name):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(b"\0")
+        if path.is_file():
+            digest.update(file_digest(path).encode("ascii"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def _parse_issue_date(value: str):
+    for fmt in ISSUE_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def source_date_epoch(revisions_csv=None) -> int:
+    """
+    SOURCE_DATE_EPOCH if set, otherwise the latest issue date in the
+    revisions CSV.
+    """
+    explicit = os.environ.get("SOURCE_DATE_EPOCH")
+    if explicit:
+        return int(explicit)
+
+    latest = None
+    if revisions_csv is not None and revisions_csv.exists():
+        with revisions_csv.open("r", encoding=CSV_ENCODING, newline="") as f:
+            for row in csv.DictReader(f, delimiter=CSV_DELIMITER):
+                issued = _parse_issue_date((row.get("issue_date") or "").strip())
+                if issued is not None and (latest is None or issued > latest):
+                    latest = issued
+
+    return int(latest.timestamp()) if latest is not None else DEFAULT_EPOCH
+
+
+# ---------------------------------------------------------------------------
+# pdflatex settings
+# ---------------------------------------------------------------------------
+
+def reproducible_env(epoch: int) -> dict:
+    """
+    Environment for pdfTeX with all timestamps pinned to `epoch`.
+
+    FORCE_SOURCE_DATE also makes \\today and \\time follow SOURCE_DATE_EPOCH.
+    """
+    env = dict(os.environ)
+    env["SOURCE_DATE_EPOCH"] = str(epoch)
+    env["FORCE_SOURCE_DATE"] = "1"
+    env["TZ"] = "UTC"
+    return env
+
+
+def reproducible_preamble(manifest: str) -> str:
+    """
+    pdfTeX primitives run before the document is read: a trailer /ID derived
+    from the manifest, and no PTEX.* keys (they embed absolute input paths).
+    """
+    return (
+        f"\\pdftrailerid{{{manifest}}}"
+        "\\pdfsuppressptexinfo=-1"
+    )
+
+
+def luatex_reproducible_preamble(manifest: str) -> str:
+    """`reproducible_preamble` for LuaTeX, which names the settings differently."""
+    return (
+        f"\\pdfvariable trailerid{{[<{manifest}><{manifest}>]}}"
+        "\\pdfvariable suppressoptionalinfo 15 "
+    )
@@ -0,0 +1,269 @@
+from filename_parser import category_is_element_based
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+# Built-in drawing list layout. A project category registry may replace any
+# top-level key with a "rules" table of the same shape.
+DEFAULT_RULES = {
+    # Sections in list order; a code belongs to the first section whose
+    # "when" conditions all hold. "order" sorts within the section:
+    #   code   - by drawing code
+    #   blocks - category block, then type code, then category within block
+    #   name   - by filename
+    "sections": [
+        {
+            "label": "Plan views & sections",
+            "when": {"kind": "numeric", "element_based": False},
+            "order": "code",
+        },
+        {
+            "label": "Panel drawings",
+            "when": {"kind": "numeric", "element_based": True},
+            "order": "blocks",
+        },
+        {"label": "3D models", "when": {"prefix": "M"}, "order": "code"},
+        {
+            "label": "Documents, calculation & misc.",
+            "when": {"kind": "alphanumeric"},
+            "order": "code",
+        },
+        {"label": "Documents, calculation & misc.", "when": {}, "order": "name"},
+    ],
+    # Category blocks for "blocks" ordering
+    "blocks": [
+        ["11", "12", "13", "14", "19"],  # Wall panels
+        ["41", "42", "43", "44"],  # Buttresses
+        ["61", "62", "63", "64"],  # Roof
+    ],
+    # Tank groups: tanks listed in "first" lead, then numeric tanks in order,
+    # then the rest by name
+    "groups": {
+        "first": ["General"],
+        "labels": {"General": "General (Tank 00)"},
+        "label": "Tank {tank}",
+    },
+}
+
+ORDERS = {"code", "blocks", "name"}
+KINDS = {"numeric", "alphanumeric", "other"}
+CONDITIONS = {"kind", "element_based", "prefix", "categories", "codes"}
+
+# Block position of categories outside every block
+UNBLOCKED = 999
+
+
+# ---------------------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------------------
+
+def _string_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def validate_rules(spec, where: str = "rules") -> dict:
+    """
+    Check a rules table and return it merged over DEFAULT_RULES.
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where}: expected a table")
+    unknown = set(spec) - set(DEFAULT_RULES)
+    if unknown:
+        raise ValueError(f"{where}: unknown key(s) {', '.join(sorted(unknown))}")
+
+    rules = {**DEFAULT_RULES, **spec}
+
+    sections = rules["sections"]
+    if not isinstance(sections, list) or not sections:
+        raise ValueError(f"{where}.sections: expected a non-empty list")
+    for index, section in enumerate(sections):
+        at = f"{where}.sections[{index}]"
+        if not isinstance(section, dict):
+            raise ValueError(f"{at}: expected a table")
+        if not isinstance(section.get("label"), str) or not section["label"]:
+            raise ValueError(f"{at}: 'label' must be a non-empty string")
+        if section.get("order", "code") not in ORDERS:
+            raise ValueError(f"{at}: 'order' must be one of {', '.join(sorted(ORDERS))}")
+
+        when = section.get("when", {})
+        if not isinstance(when, dict):
+            raise ValueError(f"{at}.when: expected a table")
+        unknown = set(when) - CONDITIONS
+        if unknown:
+            raise ValueError(f"{at}.when: unknown condition(s) {', '.join(sorted(unknown))}")
+        if "kind" in when and when["kind"] not in KINDS:
+            raise ValueError(f"{at}.when: 'kind' must be one of {', '.join(sorted(KINDS))}")
+        if "element_based" in when and not isinstance(when["element_based"], bool):
+            raise ValueError(f"{at}.when: 'element_based' must be true or false")
+        for key in ("categories", "codes"):
+            if key in when and not _string_list(when[key]):
+                raise ValueError(f"{at}.when: '{key}' must be a list of strings")
+        if "prefix" in when and not (
+            isinstance(when["prefix"], str) or _string_list(when["prefix"])
+        ):
+            raise ValueError(f"{at}.when: 'prefix' must be a string or list of strings")
+
+    blocks = rules["blocks"]
+    if not isinstance(blocks, list) or not all(_string_list(block) for block in blocks):
+        raise ValueError(f"{where}.blocks: expected a list of category lists")
+
+    groups = rules["groups"]
+    if not isinstance(groups, dict):
+        raise ValueError(f"{where}.groups: expected a table")
+    groups = {**DEFAULT_RULES["groups"], **groups}
+    if not _string_list(groups["first"]):
+        raise ValueError(f"{where}.groups: 'first' must be a list of tanks")
+    if not isinstance(groups["labels"], dict) or not all(
+        isinstance(value, str) for value in groups["labels"].values()
+    ):
+        raise ValueError(f"{where}.groups: 'labels' must map tanks to strings")
+    if not isinstance(groups["label"], str) or "{tank}" not in groups["label"]:
+        raise ValueError(f"{where}.groups: 'label' must contain '{{tank}}'")
+    rules["groups"] = groups
+
+    return rules
+
+
+# ---------------------------------------------------------------------------
+# Compiled rules
+# ---------------------------------------------------------------------------
+
+def _kind(code: str) -> str:
+    if code.isdigit():
+        return "numeric"
+    if len(code) == 4 and code[0].isalpha() and code[1:].isdigit():
+        return "alphanumeric"
+    return "other"
+
+
+def _compile_condition(when: dict):
+    """Turn a "when" table into one predicate over a drawing code."""
+    checks = []
+    if "kind" in when:
+        kind = when["kind"]
+        checks.append(lambda code: _kind(code) == kind)
+    if "element_based" in when:
+        wanted = when["element_based"]
+        checks.append(
+            lambda code: code.isdigit() and category_is_element_based(code[:2]) == wanted
+        )
+    if "prefix" in when:
+        prefixes = when["prefix"]
+        prefixes = (prefixes,) if isinstance(prefixes, str) else tuple(prefixes)
+        checks.append(lambda code: code.startswith(prefixes))
+    if "categories" in when:
+        categories = frozenset(when["categories"])
+        checks.append(lambda code: code.isdigit() and code[:2] in categories)
+    if "codes" in when:
+        codes = frozenset(when["codes"])
+        checks.append(lambda code: code in codes)
+    return lambda code: all(check(code) for check in checks)
+
+
+class RuleSet:
+    """Section, group and sort rules compiled into lookups memoised per drawing code."""
+
+    def __init__(self, rules: dict = DEFAULT_RULES):
+        self.labels = [section["label"] for section in rules["sections"]]
+        self.orders = [section.get("order", "code") for section in rules["sections"]]
+        self._conditions = [
+            _compile_condition(section.get("when", {})) for section in rules["sections"]
+        ]
+        self.block_position = {
+            category: (block_index, category_index)
+            for block_index, block in enumerate(rules["blocks"])
+            for category_index, category in enumerate(block)
+        }
+
+        groups = rules["groups"]
+        self._first = {tank: index for index, tank in enumerate(groups["first"])}
+        self._group_labels = dict(groups["labels"])
+        self._group_label = groups["label"]
+
+        self._codes = {}
+        self._tanks = {}
+
+    # -- sections -----------------------------------------------------------
+
+    def code_keys(self, code: str) -> tuple:
+        """
+        (section, key1, key2, key3) for a code. For "code" ordered sections
+        key1 is the code itself; callers needing integers replace it with
+        the code's rank.
+        """
+        keys = self._codes.get(code)
+        if keys is None:
+            keys = self._codes[code] = self._classify(code)
+        return keys
+
+    def _classify(self, code: str) -> tuple:
+        for section, condition in enumerate(self._conditions):
+            if condition(code):
+                break
+        else:
+            # Unmatched codes go after every section, ordered by filename
+            return len(self._conditions), 0, 0, 0
+
+        order = self.orders[section]
+        if order == "code":
+            return section, code, 0, 0
+        if order == "blocks" and code.isdigit():
+            block_index, category_index = self.block_position.get(
+                code[:2], (UNBLOCKED, UNBLOCKED)
+            )
+            return section, block_index, int(code[2:]), category_index
+        return section, 0, 0, 0
+
+    def orders_by_code(self, section: int) -> bool:
+        return section < len(self.orders) and self.orders[section] == "code"
+
+    def section_label(self, code: str) -> str:
+        section = self.code_keys(code)[0]
+        return self.labels[section] if section < len(self.labels) else self.labels[-1]
+
+    def sort_key(self, name: str, code: str) -> tuple:
+        """Order of a file within one tank group."""
+        return self.code_keys(code) + (name,)
+
+    # -- groups -------------------------------------------------------------
+
+    def tank_key(self, tank: str) -> tuple:
+        key = self._tanks.get(tank)
+        if key is None:
+            if tank in self._first:
+                key = (0, self._first[tank], "")
+            elif tank.isdigit():
+                key = (1, int(tank), "")
+            else:
+                key = (2, 0, tank)
+            self._tanks[tank] = key
+        return key
+
+    def tank_label(self, tank: str) -> str:
+        label = self._group_labels.get(tank)
+        if label is None:
+            label = self._group_label.format(tank=tank)
+        return label
+
+
+_active = None
+
+
+def active_rules() -> RuleSet:
+    """The rules in effect (built-in unless a project registry set some)."""
+    global _active
+    if _active is None:
+        _active = RuleSet(DEFAULT_RULES)
+    return _active
+
+
+def use_rules(rules=None) -> None:
+    """
+    Activate a validated rules table, or the built-in rules for None.
+    Always recompiles, so category changes (element_based) are picked up.
+    """
+    global _active
+    _active = RuleSet(rules if rules is not None else DEFAULT_RULES)
@@ -0,0 +1,325 @@
+import argparse
+import html
+import json
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from config import PACKAGES
+from fileops import listing_digest
+from generate_doc_list import (
+    ROW_COLUMNS,
+    document_row,
+    load_register,
+    load_revision_data,
+    write_latex_list,
+)
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DOCUMENTS_DIR = PROJECT_ROOT / "data" / "documents"
+DEFAULT_REVISIONS_CSV = PROJECT_ROOT / "data" / "revisions.csv"
+
+FORMATS = {
+    "json": "application/json; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+    "pdf": "application/pdf",
+}
+
+POLL_INTERVAL = 2.0  # seconds between folder scans
+CACHE_SIZE = 64      # rendered registers kept in memory
+
+COLUMN_TITLES = ("Filename", "Ext.", "Description", "Rev", "Issue date", "Status")
+
+
+# ---------------------------------------------------------------------------
+# Register state
+# ---------------------------------------------------------------------------
+
+class RegisterState:
+    """Parsed register and revisions for one input snapshot."""
+
+    def __init__(self, documents_dir: Path, revisions_csv: Path, key: str):
+        self.key = key
+        self.register = load_register(documents_dir)
+        self.revisions = load_revision_data(revisions_csv)
+
+
+class RegisterWatcher(threading.Thread):
+    """Keep the parsed register in memory and reload it when inputs change."""
+
+    def __init__(self, documents_dir: Path, revisions_csv: Path, interval: float):
+        super().__init__(daemon=True)
+        self.documents_dir = documents_dir
+        self.revisions_csv = revisions_csv
+        self.interval = interval
+        self.state = self._load()
+
+    def _load(self) -> RegisterState:
+        key = listing_digest(self.documents_dir, self.revisions_csv)
+        return RegisterState(self.documents_dir, self.revisions_csv, key)
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                key = listing_digest(self.documents_dir, self.revisions_csv)
+                if key != self.state.key:
+                    self.state = self._load()
+                    print(f"Register reloaded ({len(self.state.register)} documents)")
+            except (OSError, ValueError) as error:
+                print(f"Warning: Cannot reload register: {error}")
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def render_json(state: RegisterState, pkg: str) -> bytes:
+    sections = [
+        {
+            "label": label,
+            "documents": [document_row(file, state.revisions) for file in files],
+        }
+        for label, files in state.register.sections(pkg)
+    ]
+    payload = {"package": pkg, "title": PACKAGES[pkg]["title"], "sections": sections}
+    return json.dumps(payload, indent=2).encode("utf-8")
+
+
+def render_html(state: RegisterState, pkg: str) -> bytes:
+    title = html.escape(PACKAGES[pkg]["title"])
+    header = "".join(f"<th>{name}</th>" for name in COLUMN_TITLES)
+    lines = [
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title></head>",
+        f"<body><h1>{title}</h1><table><tr>{header}</tr>",
+    ]
+    span = len(COLUMN_TITLES)
+
+    for label, files in state.register.sections(pkg):
+        lines.append(f"<tr><th colspan='{span}'>{html.escape(label)}</th></tr>")
+        current_section = None
+        for file in files:
+            row = document_row(file, state.revisions)
+            if row["section"] != current_section:
+                current_section = row["section"]
+                lines.append(
+                    f"<tr><td colspan='{span}'><b>{html.escape(current_section)}</b></td></tr>"
+                )
+            cells = "".join(f"<td>{html.escape(row[column])}</td>" for column in ROW_COLUMNS)
+            lines.append(f"<tr>{cells}</tr>")
+
+    lines.append("</table></body></html>")
+    return "\n".join(lines).encode("utf-8")
+
+
+def render_pdf(state: RegisterState, pkg: str) -> bytes:
+    """
+    Compile a package report in a private scratch folder; the list and the
+    wrapper are both written there, so PDF renders can run concurrently.
+    """
+    from build import run_tex, scratch_root
+    from report_wrapper import write_report_wrapper
+
+    with tempfile.TemporaryDirectory(prefix=f"serve-{pkg}-", dir=scratch_root()) as scratch:
+        scratch = Path(scratch)
+        document_list = scratch / f"document_list_{pkg}.tex"
+        write_latex_list(
+            state.register.sections(pkg),
+            document_list,
+            state.revisions,
+            PACKAGES[pkg]["title"],
+        )
+        tex_file = write_report_wrapper(pkg, document_list, scratch)
+        run_tex(tex_file, scratch)
+        return (scratch / f"{tex_file.stem}.pdf").read_bytes()
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class RenderCache:
+    """
+    LRU cache of rendered registers; concurrent requests for one key share
+    its render.
+    """
+
+    def __init__(self, renderers: dict, size: int):
+        self.renderers = renderers
+        self.size = size
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, state: RegisterState, pkg: str, fmt: str) -> bytes:
+        key = (state.key, pkg, fmt)
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.pending[key] = future
+                self.misses += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            body = self.renderers[fmt](state, pkg)
+        except BaseException as error:
+            with self.lock:
+                self.pending.pop(key, None)
+            future.set_exception(error)
+            raise
+
+        with self.lock:
+            self.entries[key] = body
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+            self.pending.pop(key, None)
+        future.set_result(body)
+        return body
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def make_handler(watcher: RegisterWatcher, cache: RenderCache):
+    class RegisterHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.split("?", 1)[0].strip("/").split("/")
+
+            if parts == [""] or parts == ["register"]:
+                index = {
+                    "packages": sorted(PACKAGES),
+                    "formats": sorted(FORMATS),
+                    "input_hash": watcher.state.key,
+                    "cache": {"hits": cache.hits, "misses": cache.misses},
+                }
+                return self._send(HTTPStatus.OK, FORMATS["json"], json.dumps(index).encode())
+
+            if len(parts) != 2 or parts[0] != "register" or "." not in parts[1]:
+                return self._send(HTTPStatus.NOT_FOUND, "text/plain", b"Not found\n")
+
+            pkg, fmt = parts[1].rsplit(".", 1)
+            if pkg not in PACKAGES or fmt not in FORMATS:
+                return self._send(HTTPStatus.NOT_FOUND, "text/plain", b"Unknown package or format\n")
+
+            try:
+                body = cache.get(watcher.state, pkg, fmt)
+            except Exception as error:
+                message = f"Render failed: {error}\n".encode("utf-8")
+                return self._send(HTTPStatus.INTERNAL_SERVER_ERROR, "text/plain", message)
+
+            self._send(HTTPStatus.OK, FORMATS[fmt], body)
+
+        def _send(self, status, content_type: str, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return RegisterHandler
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve drawing registers from an in-memory, auto-reloading cache."
+    )
+    parser.add_argument(
+        "--documents-dir",
+        type=Path,
+        default=DEFAULT_DOCUMENTS_DIR,
+        help="Folder containing drawing/document files.",
+    )
+    parser.add_argument(
+        "--revisions-csv",
+        type=Path,
+        help=(
+            "Revisions CSV path. Defaults to <documents-dir>/revisions.csv for "
+            "an external documents folder, as in build.py."
+        ),
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=POLL_INTERVAL,
+        help="Seconds between checks of the documents folder for changes.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=CACHE_SIZE,
+        help="Number of rendered registers kept in memory.",
+    )
+    parser.add_argument(
+        "--categories",
+        type=Path,
+        help="Optional project category registry (.json or .toml).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.categories is not None:
+        from category_registry import use_registry
+
+        use_registry(args.categories.expanduser().resolve())
+    documents_dir = args.documents_dir.expanduser().resolve()
+    if args.revisions_csv is not None:
+        revisions_csv = args.revisions_csv.expanduser().resolve()
+    elif documents_dir != DEFAULT_DOCUMENTS_DIR:
+        # Same default as build.py for an external documents folder
+        revisions_csv = documents_dir / "revisions.csv"
+    else:
+        revisions_csv = DEFAULT_REVISIONS_CSV
+
+    watcher = RegisterWatcher(documents_dir, revisions_csv, args.poll_interval)
+    watcher.start()
+
+    renderers = {
+        "json": render_json,
+        "html": render_html,
+        "pdf": render_pdf,
+    }
+    cache = RenderCache(renderers, args.cache_size)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(watcher, cache))
+    print(f"Serving registers on http://{args.host}:{args.port}/register/<package>.<pdf|html|json>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
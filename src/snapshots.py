@@ -0,0 +1,344 @@
+import argparse
+import hashlib
+import os
+import pickle
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from filename_parser import get_tank_number
+from generate_doc_list import parse_packages, row_values
+from register import PACKAGE_BITS, ColumnarRegister
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snap"
+
+# Average rows per block. Block boundaries are picked by a hash of the
+# filename, so inserting or removing documents only changes nearby blocks.
+BLOCK_SPREAD = 64
+
+FOOTER = struct.Struct("<Q")
+
+CHANGE_KINDS = ("Added", "Revised", "Removed")
+
+
+# ---------------------------------------------------------------------------
+# Snapshots
+# ---------------------------------------------------------------------------
+
+def _is_boundary(name: str) -> bool:
+    return zlib.crc32(name.encode("utf-8")) % BLOCK_SPREAD == 0
+
+
+def write_snapshot(path: Path, rows) -> Path:
+    """
+    Write name-sorted (name, rev, issue_date, status, package mask) rows as
+    hashed blocks plus an index, so diffs can skip unchanged blocks.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    index = []
+
+    try:
+        with temp.open("wb") as f:
+            def flush(block):
+                payload = pickle.dumps(block, protocol=pickle.HIGHEST_PROTOCOL)
+                digest = hashlib.sha256(payload).hexdigest()[:32]
+                index.append((block[-1][0], digest, f.tell(), len(payload)))
+                f.write(payload)
+
+            block = []
+            for row in rows:
+                block.append(row)
+                if _is_boundary(row[0]):
+                    flush(block)
+                    block = []
+            if block:
+                flush(block)
+
+            index_offset = f.tell()
+            pickle.dump(
+                {
+                    "version": SNAPSHOT_VERSION,
+                    "created": time.time(),
+                    "packages": list(PACKAGE_BITS),
+                    "blocks": index,
+                },
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+            f.write(FOOTER.pack(index_offset))
+        os.replace(temp, path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+class Snapshot:
+    """A stored snapshot whose blocks are read on demand."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as f:
+            f.seek(-FOOTER.size, os.SEEK_END)
+            (index_offset,) = FOOTER.unpack(f.read(FOOTER.size))
+            f.seek(index_offset)
+            header = pickle.load(f)
+
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {path}")
+        self.created = header["created"]
+        self.blocks = header["blocks"]
+        self.blocks_read = 0
+        # Snapshots from before the package list was stored used the same bits
+        self.packages = header.get("packages", list(PACKAGE_BITS))
+        self._bits = None
+        if self.packages != list(PACKAGE_BITS):
+            self._bits = [PACKAGE_BITS.get(pkg, 0) for pkg in self.packages]
+
+    def block_key(self, index: int) -> tuple:
+        last_name, digest, _, _ = self.blocks[index]
+        return last_name, digest
+
+    def block_rows(self, index: int) -> list:
+        _, _, offset, length = self.blocks[index]
+        with self.path.open("rb") as f:
+            f.seek(offset)
+            self.blocks_read += 1
+            rows = pickle.loads(f.read(length))
+        if self._bits is None:
+            return rows
+        return [row[:4] + (self.current_mask(row[4]),) for row in rows]
+
+    def current_mask(self, mask: int) -> int:
+        """A stored package mask in the current PACKAGE_BITS."""
+        return sum(bit for index, bit in enumerate(self._bits) if mask >> index & 1)
+
+
+def snapshot_row(name: str, revision: dict, mask: int) -> tuple:
+    return (
+        name,
+        revision.get("rev") or "",
+        revision.get("issue_date") or "",
+        (revision.get("status") or "").strip(),
+        mask,
+    )
+
+
+def snapshot_rows(register, revisions: dict):
+    """Routed register rows in snapshot order (sorted by filename)."""
+    for row in sorted(range(len(register)), key=register.names.__getitem__):
+        mask = register.packages[row]
+        if not mask:
+            continue
+        name = register.names[row]
+        revision = revisions.get(os.path.splitext(name)[0].split("_", 1)[0], {})
+        yield snapshot_row(name, revision, mask)
+
+
+def new_snapshot_path(snapshot_dir: Path) -> Path:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = snapshot_dir / f"register-{stamp}{SNAPSHOT_SUFFIX}"
+    counter = 1
+    while path.exists():
+        path = snapshot_dir / f"register-{stamp}-{counter}{SNAPSHOT_SUFFIX}"
+        counter += 1
+    return path
+
+
+def _snapshot_order(path: Path) -> tuple:
+    """
+    Sort key of register-<date>-<time>[-<counter>].snap. Names do not sort
+    as text: "-1" sorts before the suffix of the first same-second snapshot.
+    """
+    parts = path.stem.split("-")
+    counter = int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else 0
+    return parts[1:3], counter
+
+
+def latest_snapshot(snapshot_dir: Path) -> Optional[Path]:
+    if not snapshot_dir.is_dir():
+        return None
+    snapshots = snapshot_dir.glob(f"register-*{SNAPSHOT_SUFFIX}")
+    return max(snapshots, key=_snapshot_order, default=None)
+
+
+# ---------------------------------------------------------------------------
+# Diff
+# ---------------------------------------------------------------------------
+
+def _diff_rows(old_rows: list, new_rows: list):
+    """Merge-diff two name-sorted row lists; yields (old, new) that differ."""
+    i = j = 0
+    while i < len(old_rows) or j < len(new_rows):
+        old = old_rows[i] if i < len(old_rows) else None
+        new = new_rows[j] if j < len(new_rows) else None
+        if new is None or (old is not None and old[0] < new[0]):
+            yield old, None
+            i += 1
+        elif old is None or new[0] < old[0]:
+            yield None, new
+            j += 1
+        else:
+            if old != new:
+                yield old, new
+            i += 1
+            j += 1
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot):
+    """
+    Yield (old row, new row) for each document that differs (None when added
+    or removed); identical blocks are skipped unread.
+    """
+    # Equal digests only mean equal routing when the masks share bits
+    skip = old.packages == new.packages
+    i = j = 0
+    old_pending, new_pending = [], []
+    old_end = new_end = None
+
+    while True:
+        if not old_pending and not new_pending:
+            if (
+                skip
+                and i < len(old.blocks)
+                and j < len(new.blocks)
+                and old.block_key(i) == new.block_key(j)
+            ):
+                i += 1
+                j += 1
+                continue
+            if i >= len(old.blocks) and j >= len(new.blocks):
+                return
+
+        if old_pending and new_pending and old_end == new_end:
+            yield from _diff_rows(old_pending, new_pending)
+            old_pending, new_pending = [], []
+            old_end = new_end = None
+            continue
+
+        if i < len(old.blocks) and (
+            j >= len(new.blocks)
+            or old_end is None
+            or (new_end is not None and old_end < new_end)
+        ):
+            old_pending.extend(old.block_rows(i))
+            old_end = old.blocks[i][0]
+            i += 1
+        elif j < len(new.blocks):
+            new_pending.extend(new.block_rows(j))
+            new_end = new.blocks[j][0]
+            j += 1
+        else:
+            yield from _diff_rows(old_pending, new_pending)
+            return
+
+
+def package_changes(differences, packages) -> dict:
+    """
+    Added, Revised and Removed rows per package; routing into or out of a
+    package counts as added or removed.
+    """
+    changes = {pkg: {kind: [] for kind in CHANGE_KINDS} for pkg in packages}
+    for old, new in differences:
+        for pkg in packages:
+            bit = PACKAGE_BITS[pkg]
+            in_old = old is not None and old[4] & bit
+            in_new = new is not None and new[4] & bit
+            if in_new and not in_old:
+                changes[pkg]["Added"].append(new)
+            elif in_old and not in_new:
+                changes[pkg]["Removed"].append(old)
+            elif in_old and in_new and (old[1], old[3]) != (new[1], new[3]):
+                changes[pkg]["Revised"].append((old, new))
+    return changes
+
+
+# ---------------------------------------------------------------------------
+# Delta register
+# ---------------------------------------------------------------------------
+
+def _was(new: str, old: str) -> str:
+    return new if new == old else f"{new or '-'} (was {old or '-'})"
+
+
+def delta_groups(changes: dict):
+    """
+    (label, rows) groups for write_latex_rows: one group per change kind,
+    ordered like the drawing list and sub-headed by tank.
+    """
+    for kind in CHANGE_KINDS:
+        entries = changes[kind]
+        if not entries:
+            continue
+
+        by_name = {}
+        for entry in entries:
+            old, new = entry if kind == "Revised" else (None, entry)
+            by_name[new[0]] = (old, new)
+
+        register = ColumnarRegister.from_names(Path(), list(by_name))
+        rows = []
+        for row in register.sorted_rows(range(len(register))):
+            old, new = by_name[register.names[row]]
+            name, rev, issue_date, status, _ = new
+            if old is not None:
+                rev = _was(rev, old[1])
+                status = _was(status, old[3])
+            values = row_values(
+                name, {"rev": rev, "issue_date": issue_date, "status": status}
+            )
+            values["section"] = register.rules.tank_label(get_tank_number(name))
+            rows.append(values)
+        yield kind, rows
+
+
+def change_counts(changes: dict) -> str:
+    return ", ".join(f"{len(changes[kind])} {kind.lower()}" for kind in CHANGE_KINDS)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare two register snapshots written by build.py."
+    )
+    parser.add_argument("old", type=Path, help="Earlier snapshot.")
+    parser.add_argument("new", type=Path, help="Later snapshot.")
+    parser.add_argument(
+        "--packages",
+        help="Comma-separated packages. Defaults to all packages.",
+    )
+    args = parser.parse_args(argv)
+
+    old = Snapshot(args.old.expanduser().resolve())
+    new = Snapshot(args.new.expanduser().resolve())
+    changes = package_changes(diff_snapshots(old, new), parse_packages(args.packages))
+
+    for pkg, kinds in changes.items():
+        print(f"{pkg}: {change_counts(kinds)}")
+        for kind in CHANGE_KINDS:
+            for entry in kinds[kind]:
+                old_row, new_row = entry if kind == "Revised" else (None, entry)
+                detail = ""
+                if old_row is not None:
+                    detail = f" rev {_was(new_row[1], old_row[1])}, status {_was(new_row[3], old_row[3])}"
+                print(f"  {kind.lower():8} {new_row[0]}{detail}")
+    print(
+        f"Read {old.blocks_read + new.blocks_read} of "
+        f"{len(old.blocks) + len(new.blocks)} blocks"
+    )
+
+
+if __name__ == "__main__":
+    main()
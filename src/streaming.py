@@ -0,0 +1,274 @@
+import csv
+import heapq
+import os
+import pickle
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Optional
+
+import metrics
+from config import CSV_DELIMITER
+from discovery import DEFAULT_PRECEDENCE, discover, drawing_id
+from filename_parser import code_packages, get_drawing_code, get_tank_number
+from generate_doc_list import (
+    report_parts,
+    row_values,
+    write_latex_rows,
+    write_list_parts,
+)
+from register import package_mask
+from rules import active_rules
+from snapshots import snapshot_row, write_snapshot
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+# Records held in memory per sort before a sorted run is spilled to disk.
+# Up to four sorts (documents, revisions, output rows, snapshot rows) hold a
+# buffer at once.
+SPILL_ROWS = 100_000
+
+# Records pickled together in a run file; bounds the memory of each run
+# reader during the merge
+RUN_BATCH = 1_000
+
+
+# ---------------------------------------------------------------------------
+# External sort
+# ---------------------------------------------------------------------------
+
+class ExternalSorter:
+    """
+    Sort tuples in bounded memory, spilling sorted runs of `max_rows` to
+    `spill_dir`.
+    """
+
+    def __init__(self, spill_dir: Path, max_rows: int = SPILL_ROWS):
+        self.spill_dir = spill_dir
+        self.max_rows = max_rows
+        self.buffer = []
+        self.runs = []
+
+    def add(self, record: tuple) -> None:
+        self.buffer.append(record)
+        if len(self.buffer) >= self.max_rows:
+            self._spill()
+
+    def _spill(self) -> None:
+        self.buffer.sort()
+        fd, name = tempfile.mkstemp(suffix=".run", dir=self.spill_dir)
+        with os.fdopen(fd, "wb") as f:
+            for start in range(0, len(self.buffer), RUN_BATCH):
+                pickle.dump(
+                    self.buffer[start:start + RUN_BATCH],
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+        self.runs.append(Path(name))
+        self.buffer = []
+
+    @staticmethod
+    def _read_run(path: Path):
+        with path.open("rb") as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    break
+                yield from batch
+        path.unlink()
+
+    def __iter__(self):
+        if not self.runs:
+            self.buffer.sort()
+            records, self.buffer = self.buffer, []
+            return iter(records)
+        if self.buffer:
+            self._spill()
+        return heapq.merge(*(self._read_run(path) for path in self.runs))
+
+
+# ---------------------------------------------------------------------------
+# Streams
+# ---------------------------------------------------------------------------
+
+def sorted_documents(
+    documents_dirs: list,
+    spill_dir: Path,
+    max_rows: int,
+    precedence: str = DEFAULT_PRECEDENCE,
+    on_document=None,
+):
+    """
+    (drawing_id, name) for every document, ordered by drawing_id. The
+    folders are listed right away; `on_document(root index, name)` sees
+    every document listed.
+    """
+    sorter = ExternalSorter(spill_dir, max_rows)
+    for root, name in discover(documents_dirs, precedence):
+        if on_document is not None:
+            on_document(root, name)
+        sorter.add((drawing_id(name), name))
+    return iter(sorter)
+
+
+def sorted_revisions(revisions_csv: Path, spill_dir: Path, max_rows: int):
+    """
+    (drawing_id, line, rev, issue_date, status) for every CSV row, ordered
+    by drawing_id and then by position in the file.
+    """
+    sorter = ExternalSorter(spill_dir, max_rows)
+    if not revisions_csv.exists():
+        return iter(sorter)
+
+    with revisions_csv.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f, delimiter=CSV_DELIMITER)
+
+        if "drawing_id" not in reader.fieldnames:
+            raise ValueError(
+                f"CSV header mismatch in {revisions_csv}. "
+                f"Found: {reader.fieldnames}"
+            )
+
+        for line, row in enumerate(reader):
+            sorter.add((
+                row["drawing_id"],
+                line,
+                row.get("rev"),
+                row.get("issue_date"),
+                row.get("status"),
+            ))
+    return iter(sorter)
+
+
+def join_revisions(documents, revisions):
+    """
+    Merge-join documents and revisions, both sorted by drawing_id, into
+    (name, revision); the last CSV row of a drawing wins.
+    """
+    pending = next(revisions, None)
+    current_id = None
+    current = {}
+
+    for document_id, name in documents:
+        if document_id != current_id:
+            current_id = document_id
+            current = {}
+            while pending is not None and pending[0] < document_id:
+                pending = next(revisions, None)
+            while pending is not None and pending[0] == document_id:
+                current = {
+                    "rev": pending[2],
+                    "issue_date": pending[3],
+                    "status": pending[4],
+                }
+                pending = next(revisions, None)
+        yield name, current
+
+
+def output_key(name: str) -> tuple:
+    """Drawing list order within a package: tank, then section keys, then name."""
+    rules = active_rules()
+    tank = get_tank_number(name)
+    return (rules.tank_key(tank), tank) + rules.sort_key(name, get_drawing_code(name))
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def stream_document_lists(
+    documents_dirs: list,
+    revisions_csv: Path,
+    output_dir: Path,
+    packages: list,
+    max_rows: int = SPILL_ROWS,
+    parts: int = 1,
+    precedence: str = DEFAULT_PRECEDENCE,
+    documents=None,
+    snapshot: Optional[Path] = None,
+) -> None:
+    """
+    Write document_list_<pkg>.tex (and its parts) for each package in memory
+    bounded by `max_rows`, identical to the in-memory path. `documents` from
+    `sorted_documents` replaces listing the folders; with `snapshot` the
+    routed register is stored there too.
+    """
+    package_index = {pkg: index for index, pkg in enumerate(packages)}
+
+    with tempfile.TemporaryDirectory(prefix="doclist-sort-") as scratch:
+        spill_dir = Path(scratch)
+
+        rows = ExternalSorter(spill_dir, max_rows)
+        snapshot_rows = ExternalSorter(spill_dir, max_rows) if snapshot else None
+        scanned = rejects = 0
+        listed = documents is None
+        # Joining and routing a listing sorted by the caller is timed apart
+        with metrics.timer("scan" if listed else "route"):
+            if listed:
+                documents = sorted_documents(documents_dirs, spill_dir, max_rows, precedence)
+            joined = join_revisions(
+                documents, sorted_revisions(revisions_csv, spill_dir, max_rows)
+            )
+            for name, revision in joined:
+                scanned += 1
+                code = get_drawing_code(name)
+                if code == "N/A":
+                    rejects += 1
+                if snapshot_rows is not None:
+                    mask = package_mask(code)
+                    if mask:
+                        snapshot_rows.add(snapshot_row(name, revision, mask))
+                targets = {
+                    package_index[pkg]
+                    for pkg in code_packages(code)
+                    if pkg in package_index
+                }
+                if not targets:
+                    continue
+                key = output_key(name)
+                values = (revision.get("rev"), revision.get("issue_date"), revision.get("status"))
+                for index in targets:
+                    rows.add((index, key) + values)
+        if listed:
+            metrics.count("files_scanned", scanned)
+            metrics.count("parse_rejects", rejects)
+            metrics.gauge("register_documents", scanned)
+        if snapshot_rows is not None:
+            with metrics.timer("snapshot"):
+                write_snapshot(snapshot, snapshot_rows)
+
+        by_package = groupby(rows, key=itemgetter(0))
+        group = next(by_package, None)
+
+        for index, pkg in enumerate(packages):
+            records = ()
+            if group is not None and group[0] == index:
+                records = group[1]
+
+            out = output_dir / f"document_list_{pkg}.tex"
+            group_starts = []
+            with metrics.timer("write", package=pkg):
+                total = write_latex_rows(_tank_groups(records), out, group_starts)
+            metrics.count("rows_written", total, package=pkg)
+            print(f"Wrote {total} documents to {out}")
+            report_parts(write_list_parts(out, group_starts, total, parts), out)
+
+            if records:
+                group = next(by_package, None)
+
+
+def _tank_groups(records):
+    """(label, rows) per tank from package records in output order, lazily."""
+    rules = active_rules()
+    for tank, tank_records in groupby(records, key=lambda record: record[1][1]):
+        yield rules.tank_label(tank), (
+            row_values(
+                key[-1], {"rev": rev, "issue_date": issue_date, "status": status}
+            )
+            for _, key, rev, issue_date, status in tank_records
+        )
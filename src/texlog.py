@@ -0,0 +1,225 @@
+import argparse
+import re
+from pathlib import Path
+from typing import Optional
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+# TeX wraps log lines at max_print_line characters (79 by default)
+MAX_PRINT_LINE = 79
+
+# Warn when any TeX memory pool is used beyond this fraction of its limit
+MEMORY_WARN_RATIO = 0.8
+
+# Box warnings listed individually; the rest are only counted
+MAX_LISTED_BOXES = 5
+
+ERROR_RE = re.compile(r"^! (.*)")
+ERROR_LINE_RE = re.compile(r"^l\.(\d+)")
+BOX_RE = re.compile(
+    r"^(Overfull|Underfull) \\([hv])box \(([^)]*)\)"
+    r"(?: in \w+ at lines (\d+)--\d+| detected at line (\d+))?"
+)
+WARNING_RE = re.compile(r"^(?:LaTeX|Package|Class) (?:\w+ )?Warning")
+RERUN_RE = re.compile(r"\bRerun\b|\(rerunfilecheck\)")
+OUTPUT_RE = re.compile(r"^Output written on .* \((\d+) pages?, (\d+) bytes\)\.")
+MEMORY_HEADER = "Here is how much of TeX's memory you used:"
+USAGE_RE = re.compile(r"^\s*(\S+) (.+?) out of (\S+)\s*$")
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+class LogReport:
+    """Diagnostics extracted from one pdflatex log."""
+
+    def __init__(self):
+        self.errors = []        # (message, source line or None)
+        self.overfull = []      # (box, amount, source line or None)
+        self.underfull = []
+        self.rerun = []         # warning lines asking for another pass
+        self.warnings = 0
+        self.pages = None       # None when no PDF was written
+        self.output_bytes = None
+        self.memory = {}        # pool -> (used, limit)
+
+    def memory_pressure(self, threshold: float = MEMORY_WARN_RATIO) -> list:
+        """(pool, used, limit, ratio) for pools above `threshold`, worst first."""
+        pressure = [
+            (pool, used, limit, used / limit)
+            for pool, (used, limit) in self.memory.items()
+            if limit and used / limit >= threshold
+        ]
+        return sorted(pressure, key=lambda item: item[3], reverse=True)
+
+    def peak_memory(self):
+        """(pool, ratio) of the most heavily used pool, or None."""
+        ratios = [
+            (pool, used / limit)
+            for pool, (used, limit) in self.memory.items()
+            if limit
+        ]
+        return max(ratios, key=lambda item: item[1], default=None)
+
+    def summary(self) -> str:
+        parts = []
+        parts.append(
+            f"{self.pages} page(s)" if self.pages is not None else "no output"
+        )
+        if self.errors:
+            parts.append(f"{len(self.errors)} error(s)")
+        if self.overfull:
+            parts.append(f"{len(self.overfull)} overfull")
+        if self.underfull:
+            parts.append(f"{len(self.underfull)} underfull")
+        if self.warnings:
+            parts.append(f"{self.warnings} warning(s)")
+        peak = self.peak_memory()
+        if peak is not None:
+            parts.append(f"peak memory {peak[1]:.0%} ({peak[0]})")
+        return ", ".join(parts)
+
+
+def unwrap(lines):
+    """Join lines TeX broke at MAX_PRINT_LINE back together."""
+    buffer = ""
+    for line in lines:
+        buffer += line
+        if len(line) != MAX_PRINT_LINE:
+            yield buffer
+            buffer = ""
+    if buffer:
+        yield buffer
+
+
+def _amount(value: str) -> int:
+    """'15000+600000' -> 615000; '57i' -> 57."""
+    return sum(int(part.rstrip("inpbs") or 0) for part in value.split("+"))
+
+
+def _parse_usage(report: LogReport, line: str) -> None:
+    match = USAGE_RE.match(line)
+    if match is None:
+        return
+    used, pool, limit = match.groups()
+
+    # "57i,8n,63p,420b,364s stack positions out of 10000i,1000n,..."
+    if "," in used:
+        for used_part, limit_part in zip(used.split(","), limit.split(",")):
+            stack = used_part[-1:]
+            report.memory[f"{pool} ({stack})"] = (_amount(used_part), _amount(limit_part))
+        return
+
+    try:
+        report.memory[pool] = (_amount(used), _amount(limit))
+    except ValueError:
+        pass
+
+
+def parse_log(log_file: Path) -> Optional[LogReport]:
+    """Parse a pdflatex log; None when the log does not exist."""
+    try:
+        text = log_file.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+
+    report = LogReport()
+    in_memory = False
+    pending_error = None
+
+    for line in unwrap(text.splitlines()):
+        if in_memory:
+            if line.startswith(" "):
+                _parse_usage(report, line)
+                continue
+            in_memory = False
+
+        if line.startswith(MEMORY_HEADER):
+            in_memory = True
+            continue
+
+        match = ERROR_RE.match(line)
+        if match:
+            if pending_error is not None:
+                report.errors.append((pending_error, None))
+            pending_error = match.group(1)
+            continue
+
+        match = ERROR_LINE_RE.match(line)
+        if match and pending_error is not None:
+            report.errors.append((pending_error, int(match.group(1))))
+            pending_error = None
+            continue
+
+        match = BOX_RE.match(line)
+        if match:
+            kind, box, amount, lines, detected = match.groups()
+            at = lines or detected
+            entry = (f"\\{box}box", amount, int(at) if at else None)
+            (report.overfull if kind == "Overfull" else report.underfull).append(entry)
+            continue
+
+        if WARNING_RE.match(line):
+            report.warnings += 1
+        if RERUN_RE.search(line):
+            report.rerun.append(line.strip())
+            continue
+
+        match = OUTPUT_RE.match(line)
+        if match:
+            report.pages = int(match.group(1))
+            report.output_bytes = int(match.group(2))
+
+    if pending_error is not None:
+        report.errors.append((pending_error, None))
+    return report
+
+
+def describe(report: LogReport) -> list:
+    """Human-readable diagnostic lines beyond the one-line summary."""
+    lines = []
+    for message, line in report.errors:
+        lines.append(f"Error: {message}" + (f" (line {line})" if line else ""))
+    for pool, used, limit, ratio in report.memory_pressure():
+        lines.append(
+            f"Warning: TeX {pool} at {ratio:.0%} of its limit ({used} of {limit})"
+        )
+    for kind, boxes in (("Overfull", report.overfull), ("Underfull", report.underfull)):
+        for box, amount, line in boxes[:MAX_LISTED_BOXES]:
+            lines.append(
+                f"{kind} {box} ({amount})" + (f" at line {line}" if line else "")
+            )
+        if len(boxes) > MAX_LISTED_BOXES:
+            lines.append(f"... {len(boxes) - MAX_LISTED_BOXES} more {kind.lower()} boxes")
+    return lines
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Summarise pdflatex logs (errors, boxes, reruns, memory usage)."
+    )
+    parser.add_argument("logs", type=Path, nargs="+", help="pdflatex .log files.")
+    args = parser.parse_args(argv)
+
+    for log_file in args.logs:
+        report = parse_log(log_file)
+        if report is None:
+            print(f"{log_file}: not found")
+            continue
+        print(f"{log_file}: {report.summary()}")
+        for line in describe(report):
+            print(f"  {line}")
+        if report.rerun:
+            print(f"  Rerun requested: {report.rerun[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+from pathlib import Path
+
+from category_registry import use_registry
+from discovery import DEFAULT_PRECEDENCE, PRECEDENCE, resolve_roots
+from fileops import link_or_copy, same_content
+from filename_parser import get_tank_number
+from generate_doc_list import get_documents, parse_packages, route_files
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def tank_folder(tank: str) -> str:
+    """Folder name for a tank as returned by `get_tank_number`."""
+    if tank == "General":
+        return "00"
+    if tank == "N/A":
+        return "unassigned"
+    return tank
+
+
+def export_package(files, package_dir: Path) -> dict:
+    """
+    Make `package_dir/<tank>/<file>` hold exactly the routed files of one
+    package, leaving identical files alone.
+    """
+    stats = {"reflink": 0, "hardlink": 0, "copy": 0, "unchanged": 0, "removed": 0}
+    expected = set()
+
+    for file in files:
+        destination = package_dir / tank_folder(get_tank_number(file.name)) / file.name
+        expected.add(destination)
+
+        if same_content(file, destination):
+            stats["unchanged"] += 1
+            continue
+
+        stats[link_or_copy(file, destination)] += 1
+
+    if package_dir.exists():
+        for existing in package_dir.rglob("*"):
+            if existing.is_file() and existing not in expected:
+                existing.unlink()
+                stats["removed"] += 1
+
+    return stats
+
+
+def export_transmittals(files, transmittal_dir: Path, packages) -> None:
+    package_files = route_files(files)
+
+    for pkg, pkg_files in package_files.items():
+        if pkg not in packages:
+            continue
+
+        package_dir = transmittal_dir / pkg
+        stats = export_package(pkg_files, package_dir)
+        summary = ", ".join(f"{count} {kind}" for kind, count in stats.items() if count)
+        print(f"Exported {len(pkg_files)} files to {package_dir} ({summary or 'empty'})")
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export per-package transmittal folders of routed documents."
+    )
+    parser.add_argument(
+        "--documents-dir",
+        action="append",
+        help=(
+            "Folder containing drawing/document files (default: data/documents). "
+            "Repeat it or pass a glob pattern to list several folders concurrently."
+        ),
+    )
+    parser.add_argument(
+        "--precedence",
+        choices=PRECEDENCE,
+        default=DEFAULT_PRECEDENCE,
+        help=(
+            "Copy exported when a drawing id is found in several document folders: "
+            "the first folder given or the newest file (default: %(default)s)."
+        ),
+    )
+    parser.add_argument(
+        "--transmittal-dir",
+        type=Path,
+        default=PROJECT_ROOT / "transmittal",
+        help="Folder where transmittal/<package>/<tank>/ trees are written.",
+    )
+    parser.add_argument(
+        "--packages",
+        help="Comma-separated packages to export. Defaults to all packages.",
+    )
+    parser.add_argument(
+        "--categories",
+        type=Path,
+        help="Optional project category registry (.json or .toml).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.categories is not None:
+        use_registry(args.categories.expanduser().resolve())
+    documents_dirs = resolve_roots(args.documents_dir or [PROJECT_ROOT / "data" / "documents"])
+    if not documents_dirs:
+        raise SystemExit("No document folder found.")
+    transmittal_dir = args.transmittal_dir.expanduser().resolve()
+
+    packages = parse_packages(args.packages)
+
+    files = get_documents(documents_dirs, args.precedence)
+    export_transmittals(files, transmittal_dir, packages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from discovery import discover, resolve_roots
+
+
+def test_existing_folders_are_taken_literally(tmp_path):
+    folder = tmp_path / "Proj [A]"
+    folder.mkdir()
+
+    assert resolve_roots([folder, folder]) == [folder.resolve()]
+
+
+def test_patterns_expand_to_sorted_folders(tmp_path):
+    for name in ("share2", "share1", "other"):
+        (tmp_path / name / "documents").mkdir(parents=True)
+
+    assert resolve_roots([tmp_path / "share*" / "documents"]) == [
+        (tmp_path / "share1" / "documents").resolve(),
+        (tmp_path / "share2" / "documents").resolve(),
+    ]
+
+
+def test_first_root_wins_a_drawing_found_twice(tmp_path):
+    roots = [tmp_path / "a", tmp_path / "b"]
+    for root in roots:
+        root.mkdir()
+        (root / "AQ430773-01-45-32-1000.pdf").touch()
+    (roots[1] / "AQ430773-01-45-32-1000_notes.pdf").touch()
+    (roots[1] / "AQ430773-01-45-32-1001.pdf").touch()
+
+    assert sorted(discover(roots, quiet=True)) == [
+        (0, "AQ430773-01-45-32-1000.pdf"),
+        (1, "AQ430773-01-45-32-1001.pdf"),
+    ]
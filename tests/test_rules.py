@@ -0,0 +1,28 @@
+import re
+
+import pytest
+
+from rules import DEFAULT_RULES, RuleSet, validate_rules
+
+
+def test_partial_rules_are_merged_over_the_defaults():
+    rules = validate_rules({"groups": {"label": "Unit {tank}"}})
+
+    assert rules["sections"] == DEFAULT_RULES["sections"]
+    assert rules["groups"]["first"] == ["General"]
+    assert RuleSet(rules).tank_label("03") == "Unit 03"
+
+
+@pytest.mark.parametrize("spec, message", [
+    ([], "rules: expected a table"),
+    ({"colours": {}}, "unknown key(s) colours"),
+    ({"sections": []}, "rules.sections: expected a non-empty list"),
+    ({"sections": [{"label": "A", "order": "size"}]}, "'order' must be one of"),
+    ({"sections": [{"label": "A", "when": {"kind": "odd"}}]}, "'kind' must be one of"),
+    ({"sections": [{"label": "A", "when": {"colour": "red"}}]}, "unknown condition(s) colour"),
+    ({"blocks": [["11", 12]]}, "rules.blocks: expected a list of category lists"),
+    ({"groups": {"label": "Tank"}}, "'label' must contain '{tank}'"),
+])
+def test_invalid_rules_are_rejected(spec, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        validate_rules(spec)
@@ -0,0 +1,64 @@
+import snapshots
+from register import PACKAGE_BITS
+from snapshots import Snapshot, diff_snapshots, package_changes, write_snapshot
+
+CLIENT, MANUFACTURE, INSTALLATION = PACKAGE_BITS.values()
+
+
+def row(number: int, rev: str = "01", status: str = "", mask: int = CLIENT) -> tuple:
+    return (f"AQ430773-01-45-32-{number:04d}.pdf", rev, "", status, mask)
+
+
+def snapshot(tmp_path, name: str, rows) -> Snapshot:
+    return Snapshot(write_snapshot(tmp_path / name, rows))
+
+
+def test_diff_reports_added_removed_and_revised(tmp_path):
+    old = snapshot(tmp_path, "old.snap", [row(1), row(2), row(3)])
+    new = snapshot(tmp_path, "new.snap", [row(2, rev="02"), row(3), row(4)])
+
+    assert list(diff_snapshots(old, new)) == [
+        (row(1), None),
+        (row(2), row(2, rev="02")),
+        (None, row(4)),
+    ]
+
+
+def test_diff_skips_unchanged_blocks(tmp_path):
+    rows = [row(number) for number in range(2000)]
+    old = snapshot(tmp_path, "old.snap", rows)
+    changed = list(rows)
+    changed[1000] = row(1000, status="IFC")
+    new = snapshot(tmp_path, "new.snap", changed)
+
+    assert list(diff_snapshots(old, new)) == [(rows[1000], changed[1000])]
+    assert len(old.blocks) > 4
+    assert old.blocks_read + new.blocks_read <= 4
+
+
+def test_package_changes_follow_routing(tmp_path):
+    old = snapshot(tmp_path, "old.snap", [row(1), row(2), row(3, mask=CLIENT)])
+    new = snapshot(tmp_path, "new.snap", [
+        row(1, rev="02"), row(2, status="IFC"), row(3, mask=MANUFACTURE),
+    ])
+    changes = package_changes(diff_snapshots(old, new), ["for_client", "for_manufacture"])
+
+    assert changes["for_client"]["Revised"] == [
+        (row(1), row(1, rev="02")), (row(2), row(2, status="IFC")),
+    ]
+    assert changes["for_client"]["Removed"] == [row(3, mask=CLIENT)]
+    assert changes["for_manufacture"]["Added"] == [row(3, mask=MANUFACTURE)]
+
+
+def test_masks_of_another_package_order_are_remapped(tmp_path, monkeypatch):
+    rows = [row(number, mask=CLIENT | INSTALLATION) for number in range(200)]
+    new = snapshot(tmp_path, "new.snap", rows)
+
+    reordered = dict(zip(reversed(PACKAGE_BITS), PACKAGE_BITS.values()))
+    monkeypatch.setattr(snapshots, "PACKAGE_BITS", reordered)
+    old_rows = [row(number, mask=reordered["for_client"] | reordered["for_installation"])
+                for number in range(200)]
+    write_snapshot(tmp_path / "old.snap", old_rows)
+    monkeypatch.undo()
+
+    assert list(diff_snapshots(Snapshot(tmp_path / "old.snap"), new)) == []
@@ -0,0 +1,30 @@
+from streaming import join_revisions
+
+
+def revision(drawing_id: str, line: int, rev: str) -> tuple:
+    return (drawing_id, line, rev, "", "")
+
+
+def test_join_matches_documents_to_their_revision():
+    documents = iter([("A", "A.pdf"), ("A", "A_notes.pdf"), ("C", "C.pdf")])
+    revisions = iter([revision("A", 0, "01"), revision("B", 1, "03"), revision("C", 2, "02")])
+
+    assert [(name, found.get("rev")) for name, found in join_revisions(documents, revisions)] == [
+        ("A.pdf", "01"), ("A_notes.pdf", "01"), ("C.pdf", "02"),
+    ]
+
+
+def test_join_takes_the_last_row_of_a_drawing():
+    documents = iter([("A", "A.pdf")])
+    revisions = iter([revision("A", 0, "01"), revision("A", 5, "02")])
+
+    assert list(join_revisions(documents, revisions)) == [
+        ("A.pdf", {"rev": "02", "issue_date": "", "status": ""}),
+    ]
+
+
+def test_join_leaves_documents_without_revision_empty():
+    documents = iter([("A", "A.pdf"), ("D", "D.pdf")])
+    revisions = iter([revision("B", 0, "01")])
+
+    assert list(join_revisions(documents, revisions)) == [("A.pdf", {}), ("D.pdf", {})]
@@ -0,0 +1,45 @@
+from texlog import MAX_PRINT_LINE, describe, parse_log
+
+LOG = """\
+This is pdfTeX, Version 3.141592653-2.6-1.40.25 (TeX Live 2023)
+! Undefined control sequence.
+l.42 \\foo
+Overfull \\hbox (12.3pt too wide) in paragraph at lines 10--12
+Underfull \\vbox (badness 10000) detected at line 7
+LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.
+Package hyperref Warning: Token not allowed in a PDF string.
+Here is how much of TeX's memory you used:
+ 900000 strings out of 1000000
+ 57i,8n,63p,420b,364s stack positions out of 10000i,1000n,20000p,200000b,200000s
+Output written on report.pdf (3 pages, 45678 bytes).
+"""
+
+
+def test_parse_log_extracts_diagnostics(tmp_path):
+    log = tmp_path / "report.log"
+    log.write_text(LOG, encoding="utf-8")
+    report = parse_log(log)
+
+    assert report.errors == [("Undefined control sequence.", 42)]
+    assert report.overfull == [("\\hbox", "12.3pt too wide", 10)]
+    assert report.underfull == [("\\vbox", "badness 10000", 7)]
+    assert report.warnings == 2
+    assert len(report.rerun) == 1
+    assert (report.pages, report.output_bytes) == (3, 45678)
+    assert report.memory["strings"] == (900000, 1000000)
+    assert report.memory["stack positions (i)"] == (57, 10000)
+    assert describe(report)[1] == "Warning: TeX strings at 90% of its limit (900000 of 1000000)"
+
+
+def test_parse_log_joins_wrapped_lines(tmp_path):
+    message = "Undefined control sequence " + "x" * MAX_PRINT_LINE
+    wrapped = "! " + message
+    lines = [wrapped[i:i + MAX_PRINT_LINE] for i in range(0, len(wrapped), MAX_PRINT_LINE)]
+    log = tmp_path / "report.log"
+    log.write_text("\n".join(lines + ["l.3 x"]) + "\n", encoding="utf-8")
+
+    assert parse_log(log).errors == [(message, 3)]
+
+
+def test_parse_log_of_missing_file(tmp_path):
+    assert parse_log(tmp_path / "missing.log") is None